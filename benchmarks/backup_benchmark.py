@@ -0,0 +1,77 @@
+"""
+Compara bytes gravados e espaço ocupado entre backups completos e incrementais.
+
+Simula uma sequência de pequenas edições no catálogo, com um backup após cada uma.
+
+Uso: python benchmarks/backup_benchmark.py [quantidade_de_livros] [quantidade_de_backups]
+"""
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.backup_service import BackupService
+from services.database_manager import DatabaseManager
+
+
+def run(tmp, backup_format, total, rounds):
+    db_path = Path(tmp) / f"{backup_format}.db"
+    db = DatabaseManager(db_path=str(db_path))
+    rng = random.Random(42)
+    db.add_books(
+        (
+            {
+                'title': f"LIVRO {i}",
+                'author': f"AUTOR {i % 1000}",
+                'publication_year': rng.randint(1800, 2024),
+                'price': round(rng.uniform(10, 150), 2)
+            }
+            for i in range(total)
+        ),
+        batch_size=10000
+    )
+
+    service = BackupService(
+        source_db=str(db_path),
+        backup_dir=str(Path(tmp) / f"backups_{backup_format}"),
+        backup_format=backup_format,
+        max_backups=rounds
+    )
+
+    bytes_written = 0
+    started = time.perf_counter()
+    for _ in range(rounds):
+        db.update_book(rng.randint(1, total), price=round(rng.uniform(10, 150), 2))
+        service.create_backup()
+        bytes_written += service.last_backup_stats['bytes_written']
+    elapsed = time.perf_counter() - started
+
+    db.engine.dispose()
+    return {
+        'bytes_written': bytes_written,
+        'stored': service.get_backup_size_total()['bytes'],
+        'seconds': elapsed,
+        'restore_points': len(service.list_backups())
+    }
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{total} livros, {rounds} backups com uma edição entre cada um\n")
+        print(f"{'FORMATO':<12} | {'GRAVADO (MB)':>12} | {'OCUPADO (MB)':>12} | {'PONTOS':>6} | {'TEMPO (s)':>9}")
+        print("-" * 64)
+        for backup_format in ("full", "incremental"):
+            result = run(tmp, backup_format, total, rounds)
+            print(f"{backup_format:<12} | {result['bytes_written'] / 2**20:>12.2f} | "
+                  f"{result['stored'] / 2**20:>12.2f} | {result['restore_points']:>6} | "
+                  f"{result['seconds']:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Compara tempo e pico de memória (RSS) da exportação CSV em streaming com a
+exportação anterior, que carregava a tabela inteira em um DataFrame.
+
+Cada modo roda em um processo separado para que o pico de memória de um não
+influencie o outro. Requer um sistema Unix (módulo resource).
+
+Uso: python benchmarks/export_benchmark.py [quantidade_de_livros]
+"""
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from services.database_manager import DatabaseManager
+
+
+def populate(db_path, total):
+    db = DatabaseManager(db_path=str(db_path))
+    rng = random.Random(42)
+    db.add_books(
+        (
+            {
+                'title': f"LIVRO {i}",
+                'author': f"AUTOR {i % 5000}",
+                'publication_year': rng.randint(1800, 2024),
+                'price': round(rng.uniform(10, 150), 2)
+            }
+            for i in range(total)
+        ),
+        batch_size=50000
+    )
+    db.engine.dispose()
+
+
+def export(mode, db_path):
+    # Executado no processo filho, dentro da pasta temporária
+    import pandas as pd
+    from services.csv_service import CSVService
+
+    db = DatabaseManager(db_path=db_path)
+    csv_service = CSVService(db)
+    started = time.perf_counter()
+
+    if mode == "pandas":
+        output = Path("exports") / "pandas.csv"
+        df = pd.read_sql_table(
+            "books",
+            db.engine,
+            columns=['id', 'title', 'author', 'publication_year', 'price', 'created_at']
+        )
+        df.to_csv(output, index=False, encoding='utf-8-sig')
+    else:
+        output = Path(csv_service.export_to_csv(f"{mode}.csv", compress=(mode == "gzip")))
+
+    elapsed = time.perf_counter() - started
+    print(json.dumps({
+        'seconds': elapsed,
+        # ru_maxrss está em KiB no Linux
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'file_mb': output.stat().st_size / 2**20
+    }))
+
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == "--child":
+        export(sys.argv[2], sys.argv[3])
+        return
+
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        print(f"Gerando {total} livros...")
+        populate(db_path, total)
+
+        print(f"\n{'MODO':<12} | {'TEMPO (s)':>9} | {'PICO RSS (MB)':>13} | {'ARQUIVO (MB)':>12}")
+        print("-" * 56)
+        for mode in ("pandas", "streaming", "gzip"):
+            output = subprocess.run(
+                [sys.executable, str(Path(__file__).resolve()), "--child", mode, str(db_path)],
+                cwd=tmp, capture_output=True, text=True, check=True,
+                env={**os.environ, 'PYTHONPATH': str(ROOT)}
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{mode:<12} | {result['seconds']:>9.2f} | {result['peak_rss_mb']:>13.1f} | "
+                  f"{result['file_mb']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Compara a busca por FTS5 com a busca antiga por LIKE.
+
+Uso: python benchmarks/search_benchmark.py [quantidade_de_livros]
+"""
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.database_manager import DatabaseManager
+
+WORDS = [
+    "SENHOR", "ANÉIS", "GUERRA", "PAZ", "CRIME", "CASTIGO", "PRÍNCIPE", "ROSA",
+    "SOLIDÃO", "MAR", "NOITE", "CIDADE", "CORAÇÃO", "TEMPO", "CAMINHO", "SERTÃO"
+]
+AUTHORS = [
+    "MACHADO DE ASSIS", "CLARICE LISPECTOR", "JORGE AMADO", "J.R.R. TOLKIEN",
+    "GEORGE ORWELL", "JOSÉ SARAMAGO", "CECÍLIA MEIRELES", "ÉRICO VERÍSSIMO"
+]
+SYLLABLES = ["BA", "CA", "DÉ", "FO", "GU", "LI", "MÃ", "NO", "PE", "RI", "SÁ", "TU", "VO", "XE"]
+
+
+def build_vocabulary(rng, size=5000):
+    vocabulary = set(WORDS)
+    while len(vocabulary) < size:
+        vocabulary.add("".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))))
+    return sorted(vocabulary)
+
+
+def populate(db, total, vocabulary, rng):
+    db.add_books(
+        (
+            {
+                'title': " ".join(rng.sample(vocabulary, 4)),
+                'author': rng.choice(AUTHORS),
+                'publication_year': rng.randint(1800, 2024),
+                'price': round(rng.uniform(10, 150), 2)
+            }
+            for _ in range(total)
+        ),
+        batch_size=10000
+    )
+
+
+def measure(search, query, repeat=5, reset=None):
+    # reset roda antes de cada repetição, fora do tempo medido (ex.: limpar o cache de buscas)
+    elapsed = 0.0
+    for _ in range(repeat):
+        if reset:
+            reset()
+        started = time.perf_counter()
+        results = search(query)
+        elapsed += time.perf_counter() - started
+    return elapsed / repeat, len(results)
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(db_path=str(Path(tmp) / "bench.db"))
+        rng = random.Random(42)
+        vocabulary = build_vocabulary(rng)
+        print(f"Populando {total} livros...")
+        populate(db, total, vocabulary, rng)
+
+        # Termos raros do vocabulário, mais buscas com acento e por autor
+        queries = rng.sample(vocabulary, 4) + ["ANEIS", "SARAMAGO"]
+
+        print(f"\n{'CONSULTA':<12} | {'LIKE (ms)':>10} | {'FTS5 (ms)':>10} | {'LIKE':>8} | {'FTS5':>8}")
+        print("-" * 60)
+        for query in queries:
+            like_time, like_count = measure(db._search_like, query)
+            fts_time, fts_count = measure(db.search_books, query, reset=db.search_cache.clear)
+            print(f"{query:<12} | {like_time * 1000:>10.1f} | {fts_time * 1000:>10.1f} | "
+                  f"{like_count:>8} | {fts_count:>8}")
+
+        db.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
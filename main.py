@@ -39,8 +39,22 @@ def main():
             
             elif choice == 2:
                 ui.print_header("LISTA DE LIVROS")
-                books = bookstore.get_all_books()
-                ui.print_books(books)
+                after_id = None
+                after_value = None
+                page_number = 1
+                
+                while True:
+                    page = bookstore.get_books_page(after_id=after_id, after_value=after_value)
+                    ui.print_info(f"Página {page_number}")
+                    ui.print_books(page['books'])
+                    
+                    if not page['has_more'] or not ui.ask_confirmation("Exibir a próxima página?"):
+                        break
+                    
+                    after_id = page['next_after_id']
+                    after_value = page['next_after_value']
+                    page_number += 1
+                
                 ui.pause()
             
             elif choice == 3:
@@ -98,10 +112,21 @@ def main():
                 ui.pause()
             
             elif choice == 7:
-                ui.print_header("EXPORTAR PARA CSV")
+                ui.print_header("EXPORTAR DADOS")
+                
+                file_format = input("Formato (csv, incremental, parquet, arrow, jsonl) [csv]: ").strip().lower() or "csv"
                 
                 try:
-                    success, message = bookstore.export_to_csv()
+                    if file_format == "csv":
+                        compress = ui.ask_confirmation("Compactar o arquivo (gzip)?")
+                        success, message = bookstore.export_to_csv(compress=compress)
+                    elif file_format == "incremental":
+                        ui.print_info("Apenas livros alterados desde a última exportação incremental.")
+                        success, message = bookstore.export_incremental()
+                    elif file_format in ("parquet", "arrow", "jsonl"):
+                        success, message = bookstore.export_data(file_format)
+                    else:
+                        success, message = False, f"Formato inválido: {file_format}"
                     
                     if success:
                         ui.print_success(message)
@@ -113,14 +138,18 @@ def main():
                 ui.pause()
             
             elif choice == 8:
-                ui.print_header("IMPORTAR DE CSV")
+                ui.print_header("IMPORTAR DADOS")
                 
-                filename = input("Nome do arquivo (padrão: books.csv): ").strip()
+                filename = input("Nome do arquivo (.csv, .parquet, .arrow, .jsonl - padrão: books.csv): ").strip()
                 if not filename:
                     filename = "books.csv"
                 
                 try:
-                    success, message, stats = bookstore.import_from_csv(filename)
+                    upsert = ui.ask_confirmation(
+                        f"Atualizar livros já cadastrados (mesmo {bookstore.db_manager.describe_key()}) "
+                        "em vez de duplicá-los?"
+                    )
+                    success, message, stats = bookstore.import_from_csv(filename, upsert=upsert)
                     
                     if success:
                         ui.print_success("Importação concluída!")
@@ -136,7 +165,11 @@ def main():
                 ui.print_header("GERAR RELATÓRIO HTML")
                 
                 try:
-                    success, message = bookstore.generate_html_report()
+                    page_size = input("Livros por página do catálogo (Enter para página única): ").strip()
+                    if page_size and not (page_size.isdigit() and int(page_size) > 0):
+                        success, message = False, f"Quantidade inválida: {page_size}"
+                    else:
+                        success, message = bookstore.generate_html_report(int(page_size) if page_size else None)
                     
                     if success:
                         ui.print_success(message)
@@ -182,11 +215,70 @@ def main():
                     if backups:
                         total_size = bookstore.backup_service.get_backup_size_total()
                         ui.print_info(f"Espaço total ocupado: {total_size['mb']} MB")
+                    
+                    metrics = bookstore.get_backup_metrics()
+                    ui.print_info(
+                        f"Backups automáticos: {metrics['backups_created']} | "
+                        f"Escritas pendentes: {metrics['pending_writes']} | "
+                        f"Último backup: {metrics['last_duration_seconds'] or 0:.2f}s | "
+                        f"Atraso atual: {metrics['current_lag_seconds']:.1f}s"
+                    )
                 except Exception as e:
                     ui.print_error(f"Erro ao listar backups: {e}")
                 
                 ui.pause()
             
+            elif choice == 13:
+                ui.print_header("RECONSTRUIR ÍNDICE DE BUSCA")
+                
+                try:
+                    success, message = bookstore.rebuild_search_index()
+                    
+                    if success:
+                        ui.print_success(message)
+                    else:
+                        ui.print_error(message)
+                except Exception as e:
+                    ui.print_error(f"Erro ao reconstruir índice: {e}")
+                
+                ui.pause()
+            
+            elif choice == 14:
+                ui.print_header("IMPORTAR ARQUIVOS PENDENTES")
+                ui.print_info("Todos os arquivos .csv da pasta imports serão importados e movidos para imports/archive.")
+                
+                try:
+                    upsert = ui.ask_confirmation(
+                        f"Atualizar livros já cadastrados (mesmo {bookstore.db_manager.describe_key()}) "
+                        "em vez de duplicá-los?"
+                    )
+                    
+                    def show_progress(progress):
+                        line = (
+                            f"  Arquivos: {progress['files_done']}/{progress['files_total']} | "
+                            f"Importados: {progress['imported']} | Com erro: {progress['failed']}"
+                        )
+                        if 'inserted' in progress:
+                            line += (
+                                f" (novos: {progress['inserted']}, atualizados: {progress['updated']}, "
+                                f"sem alteração: {progress['unchanged']})"
+                            )
+                        print(line)
+                    
+                    success, message, summary = bookstore.import_pending_files(
+                        upsert=upsert, on_progress=show_progress
+                    )
+                    
+                    if success:
+                        ui.print_success("Importação em lote concluída!")
+                        print(message)
+                    else:
+                        ui.print_error(message)
+                except Exception as e:
+                    ui.print_error(f"Erro na importação em lote: {e}")
+                
+                ui.pause()
+            
             elif choice == 0:
                 ui.print_header("ENCERRANDO SISTEMA")
                 
@@ -194,6 +286,7 @@ def main():
                     success, message = bookstore.create_manual_backup()
                     if success:
                         ui.print_success(message)
+                bookstore.close()
                 print("Todos os dados foram salvos com segurança.\n")
                 running = False
             
@@ -9,10 +9,11 @@ class Book(Base):
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     title = Column(String(200), nullable=False)
-    author = Column(String(100), nullable=False)
-    publication_year = Column(Integer, nullable=False)
-    price = Column(Float, nullable=False)
-    created_at = Column(DateTime, default=datetime.now)
+    author = Column(String(100), nullable=False, index=True)
+    publication_year = Column(Integer, nullable=False, index=True)
+    price = Column(Float, nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.now, index=True)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now, index=True)
 
     def __repr__(self):
         return f"<Book(id={self.id}, title='{self.title}', author='{self.author}')>"
@@ -0,0 +1,165 @@
+import atexit
+import logging
+import threading
+import time
+
+
+class BackupScheduler:
+    """
+    Agenda backups em uma thread de fundo, agrupando várias escritas em um único backup.
+
+    Um backup é disparado quando o número de escritas pendentes chega a
+    max_pending_writes ou quando a escrita pendente mais antiga completa
+    max_delay segundos. Registrar uma escrita nunca espera pelo backup.
+
+    Args:
+        backup_service: BackupService usado para gerar os backups
+        max_pending_writes: Escritas acumuladas que disparam um backup
+        max_delay: Tempo máximo (s) que uma escrita fica sem backup
+    """
+
+    def __init__(self, backup_service, max_pending_writes=20, max_delay=30.0):
+        self.backup_service = backup_service
+        self.max_pending_writes = max_pending_writes
+        self.max_delay = max_delay
+        self.logger = logging.getLogger(__name__)
+
+        self._condition = threading.Condition()
+        self._pending_writes = 0
+        self._first_dirty_at = None
+        self._flush_requested = False
+        self._retry_after = 0.0
+        self._stopping = False
+        self._attempts_started = 0
+        self._attempts_finished = 0
+
+        self._metrics = {
+            'backups_created': 0,
+            'backups_failed': 0,
+            'writes_coalesced': 0,
+            'last_backup_at': None,
+            'last_duration_seconds': None,
+            'last_lag_seconds': None,
+            'max_lag_seconds': 0.0
+        }
+
+        self._thread = threading.Thread(target=self._run, name="backup-scheduler", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def mark_dirty(self, writes=1):
+        with self._condition:
+            if self._stopping:
+                return
+            self._pending_writes += writes
+            if self._first_dirty_at is None:
+                # Primeira escrita pendente: a thread passa a contar o prazo
+                self._first_dirty_at = time.monotonic()
+                self._condition.notify_all()
+            elif self._pending_writes >= self.max_pending_writes:
+                self._condition.notify_all()
+
+    def flush(self, timeout=None):
+        """
+        Gera imediatamente o backup das escritas pendentes e aguarda a conclusão.
+
+        Returns:
+            bool: True se não restaram escritas pendentes
+        """
+        with self._condition:
+            if not self._thread.is_alive():
+                return self._pending_writes == 0
+
+            if self._pending_writes:
+                # Aguarda uma tentativa que comece depois deste pedido
+                target = self._attempts_started + 1
+                self._flush_requested = True
+                self._condition.notify_all()
+            else:
+                target = self._attempts_started
+
+            self._condition.wait_for(lambda: self._attempts_finished >= target, timeout=timeout)
+            return self._pending_writes == 0
+
+    def stop(self, timeout=None):
+        if not self._thread.is_alive():
+            return
+        self.flush(timeout=timeout)
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        self._thread.join(timeout=timeout)
+
+    def get_metrics(self):
+        with self._condition:
+            metrics = dict(self._metrics)
+            metrics['pending_writes'] = self._pending_writes
+            metrics['current_lag_seconds'] = (
+                round(time.monotonic() - self._first_dirty_at, 3)
+                if self._first_dirty_at is not None else 0.0
+            )
+            return metrics
+
+    def _backup_due(self):
+        if self._pending_writes == 0:
+            return False
+        if self._flush_requested or self._stopping:
+            return True
+        if time.monotonic() < self._retry_after:
+            return False
+        if self._pending_writes >= self.max_pending_writes:
+            return True
+        return time.monotonic() - self._first_dirty_at >= self.max_delay
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._backup_due():
+                    if self._stopping:
+                        return
+                    timeout = None
+                    if self._first_dirty_at is not None:
+                        due_at = max(self._first_dirty_at + self.max_delay, self._retry_after)
+                        timeout = max(0.0, due_at - time.monotonic())
+                    self._condition.wait(timeout=timeout)
+
+                writes = self._pending_writes
+                first_dirty_at = self._first_dirty_at
+                self._pending_writes = 0
+                self._first_dirty_at = None
+                self._flush_requested = False
+                self._attempts_started += 1
+
+            started = time.monotonic()
+            try:
+                backup_path = self.backup_service.create_backup()
+            except Exception as e:
+                self.logger.error(f"Erro no backup agendado: {e}")
+                backup_path = None
+            finished = time.monotonic()
+
+            with self._condition:
+                self._attempts_finished += 1
+                if backup_path:
+                    lag = finished - first_dirty_at
+                    self._metrics['backups_created'] += 1
+                    self._metrics['writes_coalesced'] += writes
+                    self._metrics['last_backup_at'] = time.time()
+                    self._metrics['last_duration_seconds'] = round(finished - started, 3)
+                    self._metrics['last_lag_seconds'] = round(lag, 3)
+                    self._metrics['max_lag_seconds'] = round(max(self._metrics['max_lag_seconds'], lag), 3)
+                    self.logger.info(
+                        f"Backup agendado concluído: {writes} escrita(s) em {finished - started:.3f}s "
+                        f"(atraso de {lag:.1f}s)"
+                    )
+                else:
+                    # Mantém as escritas como pendentes para a próxima tentativa
+                    self._metrics['backups_failed'] += 1
+                    self._retry_after = time.monotonic() + self.max_delay
+                    self._pending_writes += writes
+                    if self._first_dirty_at is None:
+                        self._first_dirty_at = first_dirty_at
+                    if self._stopping:
+                        self._condition.notify_all()
+                        return
+                self._condition.notify_all()
@@ -1,86 +1,574 @@
 from pathlib import Path
 from datetime import datetime
-import shutil
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import struct
+import tempfile
+import threading
 import logging
+import time
+import zlib
+
+from services.wal_archive_service import WalArchiveService
+
+# Formato compactado (.dbz): cabeçalho, blocos independentes comprimidos com zlib
+# (tamanho original, tamanho comprimido, dados) e, no fim, um bloco vazio seguido
+# do tamanho lógico total, para que ele possa ser lido sem descompactar o arquivo.
+COMPRESSED_MAGIC = b"BKZ1"
+COMPRESSED_FRAME = struct.Struct(">II")
+COMPRESSED_TRAILER = struct.Struct(">Q")
+
+# pre_restore_<data>_<hora>[_<contador>].db, ver _swap_into_place
+PRE_RESTORE_PATTERN = re.compile(r"pre_restore_(\d{8}_\d{6})(?:_(\d+))?\.db")
+
+class _BackupRestarted(Exception):
+    pass
 
 class BackupService:
-    def __init__(self, source_db="data/bookstore.db", backup_dir="backups"):
+    MAX_RESTARTS = 3
+    FORMATS_BY_SUFFIX = {'.db': 'full', '.manifest': 'incremental', '.dbz': 'compressed'}
+    
+    def __init__(self, source_db="data/bookstore.db", backup_dir="backups",
+                 pages_per_step=1024, step_sleep=0.0, backup_format="full",
+                 max_backups=None, chunk_size=64 * 1024,
+                 compression_workers=None, compression_level=6,
+                 compression_block_size=1024 * 1024, max_pre_restore=3):
+        """
+        Args:
+            source_db: Caminho do banco de dados
+            backup_dir: Pasta onde os backups são gravados
+            pages_per_step: Páginas copiadas por etapa da API de backup do SQLite
+                (-1 copia tudo de uma vez)
+            step_sleep: Pausa (s) entre etapas, para não disputar o banco com as
+                consultas em primeiro plano
+            backup_format: "full" (cópia completa), "incremental" (blocos deduplicados)
+                ou "compressed" (cópia completa compactada)
+            max_backups: Pontos de restauração mantidos (padrão: 5 completos ou 50 incrementais)
+            chunk_size: Tamanho dos blocos do formato incremental (múltiplo do tamanho de página)
+            compression_workers: Threads de compressão (padrão: número de CPUs)
+            compression_level: Nível de compressão zlib (1 a 9)
+            compression_block_size: Tamanho de cada bloco comprimido de forma independente
+            max_pre_restore: Cópias pre_restore_*.db (banco anterior a cada restauração)
+                mantidas ao lado do banco
+        """
+        if backup_format not in ("full", "incremental", "compressed"):
+            raise ValueError(f"Formato de backup inválido: {backup_format}")
+        
         self.source_db = Path(source_db)
         self.backup_dir = Path(backup_dir)
+        self.chunks_dir = self.backup_dir / "chunks"
+        self.pages_per_step = pages_per_step
+        self.step_sleep = step_sleep
+        self.backup_format = backup_format
+        self.max_backups = max_backups or (50 if backup_format == "incremental" else 5)
+        self.chunk_size = chunk_size
+        self.compression_workers = compression_workers or os.cpu_count() or 1
+        self.compression_level = compression_level
+        self.compression_block_size = compression_block_size
+        self.max_pre_restore = max_pre_restore
+        self.last_backup_stats = {}
         self.logger = logging.getLogger(__name__)
         
+        # Índice com os metadados de cada backup, para listar e aplicar a
+        # retenção sem percorrer a pasta a cada escrita
+        self.index_path = self.backup_dir / "index.json"
+        self._index_lock = threading.RLock()
+        # Um backup por vez: o agendador e os backups manuais podem disparar juntos
+        self._backup_lock = threading.Lock()
+        
         self.backup_dir.mkdir(parents=True, exist_ok=True)
     
-    def cleanup_old_backups(self, max_backups=5):
-        if not self.backup_dir.exists():
-            return
+    def _online_copy(self, source, target):
+        """
+        Copia um banco SQLite com a API de backup online, em etapas.
+        Leitores e escritores continuam trabalhando durante a cópia e o
+        resultado é um snapshot consistente.
+        """
+        src = sqlite3.connect(Path(source).resolve().as_uri() + "?mode=ro", uri=True)
+        try:
+            dst = sqlite3.connect(str(target))
+            try:
+                try:
+                    src.backup(dst, pages=self.pages_per_step, progress=self._make_progress())
+                except _BackupRestarted:
+                    # Escritas concorrentes reiniciam a cópia em etapas; copia tudo em uma etapa
+                    self.logger.warning("Backup reiniciado por escritas concorrentes, copiando em uma etapa")
+                    src.backup(dst, pages=-1)
+            finally:
+                dst.close()
+        finally:
+            src.close()
+    
+    def _make_progress(self):
+        state = {'remaining': None, 'restarts': 0}
         
-        backup_files = sorted(
-            self.backup_dir.glob("backup_*.db"),
-            key=lambda p: p.stat().st_mtime,
-            reverse=True #RECENTES
-        )
-
-        for old_backup in backup_files[max_backups:]:
+        def progress(status, remaining, total):
+            # O SQLite recomeça a cópia quando outra conexão altera o banco de origem
+            if state['remaining'] is not None and remaining > state['remaining']:
+                state['restarts'] += 1
+                if state['restarts'] > self.MAX_RESTARTS:
+                    raise _BackupRestarted()
+            state['remaining'] = remaining
+            
+            if self.step_sleep and remaining:
+                time.sleep(self.step_sleep)
+        
+        return progress
+    
+    def _load_index(self):
+        """
+        Lê o índice de backups (index.json). Se ele não existir ou estiver
+        corrompido, é reconstruído a partir dos arquivos da pasta de backups.
+        """
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return self.rebuild_index()
+    
+    def _save_index(self, index):
+        # Grava em um arquivo temporário e troca de forma atômica
+        tmp_path = self.index_path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=2)
+        os.replace(tmp_path, self.index_path)
+    
+    def rebuild_index(self):
+        """
+        Reconstrói o índice de backups lendo os arquivos existentes.
+        Operação lenta: calcula o checksum de cada backup.
+        
+        Returns:
+            dict: Índice reconstruído
+        """
+        with self._index_lock:
+            self.logger.warning("Reconstruindo índice de backups a partir do disco")
+            
+            backups = []
+            for backup_file in self.backup_dir.glob("backup_*"):
+                if not backup_file.is_file() or backup_file.suffix not in self.FORMATS_BY_SUFFIX:
+                    continue
+                
+                try:
+                    checksum = hashlib.sha256()
+                    logical_size = 0
+                    for block in self._iter_logical_blocks(backup_file):
+                        checksum.update(block)
+                        logical_size += len(block)
+                    
+                    info = {'row_count': None, 'schema_version': None}
+                    if backup_file.suffix == ".db":
+                        info = self._snapshot_info(backup_file)
+                    
+                    stat = backup_file.stat()
+                    backups.append({
+                        'name': backup_file.name,
+                        'format': self.FORMATS_BY_SUFFIX[backup_file.suffix],
+                        'created_at': datetime.fromtimestamp(stat.st_mtime).isoformat(),
+                        'stored_bytes': stat.st_size,
+                        'logical_size': logical_size,
+                        'checksum': checksum.hexdigest(),
+                        'row_count': info['row_count'],
+                        'schema_version': info['schema_version']
+                    })
+                except Exception as e:
+                    self.logger.error(f"Backup ignorado na reconstrução do índice {backup_file.name}: {e}")
+            
+            backups.sort(key=lambda entry: entry['created_at'], reverse=True)
+            chunk_store_bytes = 0
+            if self.chunks_dir.exists():
+                chunk_store_bytes = sum(f.stat().st_size for f in self.chunks_dir.glob("*/*"))
+            
+            index = {'backups': backups, 'chunk_store_bytes': chunk_store_bytes}
+            self._save_index(index)
+            return index
+    
+    def _snapshot_info(self, db_file):
+        conn = sqlite3.connect(Path(db_file).resolve().as_uri() + "?mode=ro", uri=True)
+        try:
+            info = {'row_count': None, 'schema_version': None}
             try:
-                old_backup.unlink()
-                self.logger.info(f"Backup antigo removido: {old_backup.name}")
-            except Exception as e:
-                self.logger.error(f"Erro ao remover backup {old_backup.name}: {e}")
+                info['row_count'] = conn.execute("SELECT COUNT(*) FROM books").fetchone()[0]
+                info['schema_version'] = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()[0]
+            except sqlite3.Error:
+                pass
+            return info
+        finally:
+            conn.close()
+    
+    def cleanup_old_backups(self, max_backups=None):
+        if max_backups is None:
+            max_backups = self.max_backups
+        
+        with self._index_lock:
+            index = self._load_index()
+            # O índice já está ordenado do mais recente para o mais antigo
+            kept = index['backups'][:max_backups]
+            removed = index['backups'][max_backups:]
+            
+            if not removed:
+                return
+            
+            released_chunks = set()
+            for old_backup in removed:
+                old_path = self.backup_dir / old_backup['name']
+                try:
+                    if old_backup['format'] == "incremental" and old_path.exists():
+                        released_chunks.update(self._read_manifest(old_path)['chunks'])
+                    old_path.unlink(missing_ok=True)
+                    self.logger.info(f"Backup antigo removido: {old_backup['name']}")
+                except Exception as e:
+                    self.logger.error(f"Erro ao remover backup {old_backup['name']}: {e}")
+                    kept.append(old_backup)
+            
+            index['backups'] = kept
+            if released_chunks:
+                index['chunk_store_bytes'] -= self._collect_garbage_chunks(released_chunks, kept)
+            self._save_index(index)
     
     def create_backup(self):
+        with self._backup_lock:
+            return self._create_backup()
+    
+    def _create_backup(self):
         if not self.source_db.exists():
             self.logger.error(f"Banco de dados não encontrado: {self.source_db}")
             return None
         
+        backup_path = None
         try:
-            self.cleanup_old_backups(max_backups=4)
+            # Abre espaço para o novo backup respeitando o limite de retenção
+            self.cleanup_old_backups(max_backups=self.max_backups - 1)
+            
+            if self.backup_format == "incremental":
+                backup_path = self._new_backup_path(".manifest")
+                info = self._create_incremental_backup(backup_path)
+            elif self.backup_format == "compressed":
+                backup_path = self._new_backup_path(".dbz")
+                info = self._create_compressed_backup(backup_path)
+            else:
+                backup_path = self._new_backup_path(".db")
+                info = self._create_full_backup(backup_path)
             
-            timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-            backup_name = f"backup_bookstore_{timestamp}.db"
-            backup_path = self.backup_dir / backup_name
+            stored_bytes = backup_path.stat().st_size
+            self.last_backup_stats = {
+                'bytes_written': stored_bytes + info.get('chunk_bytes_written', 0),
+                'logical_size': info['logical_size']
+            }
             
-            shutil.copy2(self.source_db, backup_path)
+            with self._index_lock:
+                index = self._load_index()
+                index['backups'].insert(0, {
+                    'name': backup_path.name,
+                    'format': self.backup_format,
+                    'created_at': datetime.now().isoformat(),
+                    'stored_bytes': stored_bytes,
+                    'logical_size': info['logical_size'],
+                    'checksum': info['checksum'],
+                    'row_count': info['row_count'],
+                    'schema_version': info['schema_version']
+                })
+                index['chunk_store_bytes'] += info.get('chunk_bytes_written', 0)
+                self._save_index(index)
             
-            self.logger.info(f"Backup criado com sucesso: {backup_name}")
+            self.logger.info(f"Backup criado com sucesso: {backup_path.name}")
             return backup_path
             
         except Exception as e:
             self.logger.error(f"Erro ao criar backup: {e}")
+            if backup_path is not None:
+                # Remove o nome reservado por _new_backup_path
+                backup_path.unlink(missing_ok=True)
             return None
     
-    def list_backups(self):
-        if not self.backup_dir.exists():
-            return []
+    def _new_backup_path(self, extension):
+        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        backup_path = self.backup_dir / f"backup_bookstore_{timestamp}{extension}"
+        
+        # Vários backups no mesmo segundo não podem sobrescrever um ao outro: o modo 'x'
+        # reserva o nome (falha se ele existe) e então o nome ganha um contador
+        counter = 1
+        while True:
+            try:
+                open(backup_path, 'x').close()
+                return backup_path
+            except FileExistsError:
+                backup_path = self.backup_dir / f"backup_bookstore_{timestamp}_{counter}{extension}"
+                counter += 1
+    
+    def _new_snapshot_path(self):
+        # Nome único por execução, para que dois backups nunca usem o mesmo arquivo temporário
+        fd, name = tempfile.mkstemp(prefix=".snapshot_", suffix=".tmp", dir=self.backup_dir)
+        os.close(fd)
+        return Path(name)
+    
+    def _create_full_backup(self, backup_path):
+        self._online_copy(self.source_db, backup_path)
+        
+        checksum = hashlib.sha256()
+        for block in self._iter_logical_blocks(backup_path):
+            checksum.update(block)
+        
+        return {
+            'logical_size': backup_path.stat().st_size,
+            'checksum': checksum.hexdigest(),
+            **self._snapshot_info(backup_path)
+        }
+    
+    def _create_incremental_backup(self, manifest_path):
+        """
+        Divide um snapshot do banco em blocos endereçados pelo conteúdo (SHA-256)
+        e grava apenas os blocos que ainda não existem no repositório.
+        O manifesto lista os blocos, em ordem, necessários para reconstruir o snapshot.
+        """
+        self.chunks_dir.mkdir(parents=True, exist_ok=True)
+        snapshot = self._new_snapshot_path()
+        
+        try:
+            self._online_copy(self.source_db, snapshot)
+            info = self._snapshot_info(snapshot)
+            
+            chunks = []
+            checksum = hashlib.sha256()
+            bytes_written = 0
+            chunks_written = 0
+            logical_size = 0
+            
+            with open(snapshot, 'rb') as f:
+                while True:
+                    block = f.read(self.chunk_size)
+                    if not block:
+                        break
+                    
+                    digest = hashlib.sha256(block).hexdigest()
+                    chunks.append(digest)
+                    checksum.update(block)
+                    logical_size += len(block)
+                    
+                    chunk_path = self._chunk_path(digest)
+                    if not chunk_path.exists():
+                        chunk_path.parent.mkdir(exist_ok=True)
+                        tmp_path = chunk_path.with_suffix(".tmp")
+                        tmp_path.write_bytes(block)
+                        os.replace(tmp_path, chunk_path)
+                        bytes_written += len(block)
+                        chunks_written += 1
+        finally:
+            if snapshot.exists():
+                snapshot.unlink()
+        
+        manifest = {
+            'format': 'incremental',
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'chunk_size': self.chunk_size,
+            'logical_size': logical_size,
+            'chunks': chunks
+        }
+        tmp_manifest = manifest_path.with_suffix(".tmp")
+        tmp_manifest.write_text(json.dumps(manifest), encoding='utf-8')
+        os.replace(tmp_manifest, manifest_path)
+        
+        self.logger.info(
+            f"Backup incremental: {chunks_written}/{len(chunks)} blocos novos "
+            f"({bytes_written / (1024 * 1024):.2f} MB gravados)"
+        )
+        return {
+            'logical_size': logical_size,
+            'checksum': checksum.hexdigest(),
+            'chunk_bytes_written': bytes_written,
+            **info
+        }
+    
+    def _create_compressed_backup(self, backup_path):
+        """
+        Comprime um snapshot do banco em blocos independentes, usando várias
+        threads (zlib libera o GIL) e gravando os blocos em ordem, com no máximo
+        alguns blocos em memória por vez.
+        """
+        snapshot = self._new_snapshot_path()
+        tmp_path = backup_path.with_suffix(".tmp")
+        checksum = hashlib.sha256()
+        logical_size = 0
+        
+        try:
+            self._online_copy(self.source_db, snapshot)
+            info = self._snapshot_info(snapshot)
+            
+            with open(snapshot, 'rb') as src, open(tmp_path, 'wb') as out, \
+                    ThreadPoolExecutor(max_workers=self.compression_workers) as executor:
+                out.write(COMPRESSED_MAGIC)
+                pending = deque()
+                
+                def write_next():
+                    raw_len, future = pending.popleft()
+                    data = future.result()
+                    out.write(COMPRESSED_FRAME.pack(raw_len, len(data)))
+                    out.write(data)
+                
+                while True:
+                    block = src.read(self.compression_block_size)
+                    if not block:
+                        break
+                    checksum.update(block)
+                    logical_size += len(block)
+                    pending.append((len(block), executor.submit(zlib.compress, block, self.compression_level)))
+                    if len(pending) >= self.compression_workers * 2:
+                        write_next()
+                
+                while pending:
+                    write_next()
+                
+                out.write(COMPRESSED_FRAME.pack(0, 0))
+                out.write(COMPRESSED_TRAILER.pack(logical_size))
+            
+            os.replace(tmp_path, backup_path)
+        finally:
+            for path in (snapshot, tmp_path):
+                if path.exists():
+                    path.unlink()
+        
+        self.logger.info(
+            f"Backup compactado: {logical_size / (1024 * 1024):.2f} MB -> "
+            f"{backup_path.stat().st_size / (1024 * 1024):.2f} MB"
+        )
+        return {
+            'logical_size': logical_size,
+            'checksum': checksum.hexdigest(),
+            **info
+        }
+    
+    def _iter_logical_blocks(self, backup_path):
+        """
+        Percorre o conteúdo do banco guardado em um backup, em blocos,
+        qualquer que seja o formato, sem carregá-lo inteiro na memória.
+        """
+        if backup_path.suffix == ".manifest":
+            for digest in self._read_manifest(backup_path)['chunks']:
+                yield self._chunk_path(digest).read_bytes()
+        
+        elif backup_path.suffix == ".dbz":
+            with open(backup_path, 'rb') as src:
+                if src.read(len(COMPRESSED_MAGIC)) != COMPRESSED_MAGIC:
+                    raise ValueError(f"Arquivo de backup compactado inválido: {backup_path.name}")
+                
+                while True:
+                    raw_len, compressed_len = COMPRESSED_FRAME.unpack(src.read(COMPRESSED_FRAME.size))
+                    if raw_len == 0:
+                        break
+                    block = zlib.decompress(src.read(compressed_len))
+                    if len(block) != raw_len:
+                        raise ValueError(f"Bloco corrompido no backup: {backup_path.name}")
+                    yield block
         
+        else:
+            with open(backup_path, 'rb') as src:
+                while True:
+                    block = src.read(self.compression_block_size)
+                    if not block:
+                        break
+                    yield block
+    
+    def _chunk_path(self, digest):
+        return self.chunks_dir / digest[:2] / digest
+    
+    def _read_manifest(self, manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def _collect_garbage_chunks(self, candidates, remaining_backups):
+        """
+        Remove os blocos liberados que nenhum manifesto restante referencia.
+        
+        Returns:
+            int: Bytes liberados
+        """
+        referenced = set()
+        for entry in remaining_backups:
+            if entry['format'] == "incremental":
+                referenced.update(self._read_manifest(self.backup_dir / entry['name'])['chunks'])
+        
+        freed = 0
+        removed = 0
+        for digest in candidates - referenced:
+            chunk_path = self._chunk_path(digest)
+            if chunk_path.exists():
+                freed += chunk_path.stat().st_size
+                chunk_path.unlink()
+                removed += 1
+        
+        if removed:
+            self.logger.info(f"{removed} bloco(s) de backup sem referência removido(s)")
+        return freed
+    
+    def list_backups(self):
         backups = []
-        for backup_file in sorted(self.backup_dir.glob("backup_*.db"), 
-                                   key=lambda p: p.stat().st_mtime, 
-                                   reverse=True):
-            stat = backup_file.stat()
+        for entry in self._load_index()['backups']:
+            compressed_size = entry['stored_bytes'] if entry['format'] == "compressed" else None
             backups.append({
-                'name': backup_file.name,
-                'path': backup_file,
-                'modified': datetime.fromtimestamp(stat.st_mtime),
-                'size_bytes': stat.st_size,
-                'size_mb': round(stat.st_size / (1024 * 1024), 2)
+                'name': entry['name'],
+                'path': self.backup_dir / entry['name'],
+                'format': entry['format'],
+                'modified': datetime.fromisoformat(entry['created_at']),
+                'size_bytes': entry['logical_size'],
+                'size_mb': round(entry['logical_size'] / (1024 * 1024), 2),
+                'compressed_bytes': compressed_size,
+                'compressed_mb': round(compressed_size / (1024 * 1024), 2) if compressed_size is not None else None,
+                'checksum': entry['checksum'],
+                'row_count': entry['row_count'],
+                'schema_version': entry['schema_version']
             })
         
         return backups
     
-    def restore_backup(self, backup_name):
+    def restore_backup(self, backup_name, db_manager=None, full_check=False):
+        """
+        Restaura um backup de forma verificada: o conteúdo é gravado em um arquivo
+        temporário ao lado do banco (calculando o checksum na mesma passada),
+        conferido com o índice de backups e com o PRAGMA quick_check (ou
+        integrity_check), e só então trocado pelo banco atual com um rename atômico.
+        
+        Args:
+            backup_name: Nome do arquivo de backup
+            db_manager: DatabaseManager em uso, cujo pool de conexões e caches
+                são recriados após a troca
+            full_check: Usa integrity_check (mais lento) em vez de quick_check
+            
+        Returns:
+            bool: True se o backup foi verificado e restaurado
+        """
         backup_path = self.backup_dir / backup_name
         
         if not backup_path.exists():
             self.logger.error(f"Backup não encontrado: {backup_name}")
             return False
         
+        entry = next((e for e in self._load_index()['backups'] if e['name'] == backup_name), None)
+        if entry is None:
+            self.logger.warning(f"Backup fora do índice, restaurando sem conferir checksum: {backup_name}")
+        
+        restore_path = self._restore_tmp_path()
         try:
-            current_backup = self.source_db.parent / f"pre_restore_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
-            if self.source_db.exists():
-                shutil.copy2(self.source_db, current_backup)
+            checksum = hashlib.sha256()
+            size = 0
+            with open(restore_path, 'wb') as out:
+                for block in self._iter_logical_blocks(backup_path):
+                    checksum.update(block)
+                    size += len(block)
+                    out.write(block)
+                out.flush()
+                os.fsync(out.fileno())
             
-            shutil.copy2(backup_path, self.source_db)
+            if entry is not None and (checksum.hexdigest() != entry['checksum'] or size != entry['logical_size']):
+                raise ValueError("checksum do backup não confere com o índice")
+            
+            self._verify_database(restore_path, entry['row_count'] if entry else None, full_check)
+            self._swap_into_place(restore_path, db_manager)
             
             self.logger.info(f"Backup restaurado com sucesso: {backup_name}")
             return True
@@ -88,12 +576,143 @@ class BackupService:
         except Exception as e:
             self.logger.error(f"Erro ao restaurar backup: {e}")
             return False
+        finally:
+            self._remove_restore_files(restore_path)
     
-    def get_backup_size_total(self):
-        if not self.backup_dir.exists():
-            return {'bytes': 0, 'mb': 0}
+    def restore_to_point(self, target_time, wal_archive_dir="wal_archive", db_manager=None):
+        """
+        Restaura o banco como estava em target_time, aplicando os segmentos do
+        WAL arquivados sobre o snapshot base mais recente anterior a esse instante.
+        A precisão é a do último checkpoint arquivado antes de target_time.
+        
+        Args:
+            target_time: datetime do ponto de recuperação
+            wal_archive_dir: Pasta do arquivo de WAL (ver DatabaseManager)
+            db_manager: DatabaseManager em uso (ver restore_backup)
+            
+        Returns:
+            dict: success, message e, em caso de sucesso, recovered_at,
+                segments_applied, recovery_seconds e archive_mb
+        """
+        archive = WalArchiveService(self.source_db, wal_archive_dir)
+        restore_path = self._restore_tmp_path()
+        started = time.perf_counter()
+        
+        try:
+            replay = archive.replay(target_time, restore_path)
+            self._verify_database(restore_path, None, full_check=False)
+            self._swap_into_place(restore_path, db_manager)
+            
+            elapsed = time.perf_counter() - started
+            archive_stats = archive.get_archive_stats()
+            self.logger.info(
+                f"Banco restaurado para {replay['recovered_at']}: "
+                f"{replay['segments_applied']} segmento(s) aplicados em {elapsed:.2f}s"
+            )
+            return {
+                'success': True,
+                'message': f"Banco restaurado para {replay['recovered_at']}",
+                'recovered_at': replay['recovered_at'],
+                'segments_applied': replay['segments_applied'],
+                'recovery_seconds': round(elapsed, 3),
+                'archive_mb': archive_stats['total_mb']
+            }
+        except Exception as e:
+            self.logger.error(f"Erro na restauração para um ponto no tempo: {e}")
+            return {'success': False, 'message': f"Erro na restauração: {e}"}
+        finally:
+            self._remove_restore_files(restore_path)
+    
+    def _restore_tmp_path(self):
+        # Na mesma pasta do banco, para que a troca final seja um rename atômico
+        return self.source_db.with_name(f".{self.source_db.name}.restore.tmp")
+    
+    @staticmethod
+    def _remove_restore_files(restore_path):
+        for leftover in (restore_path, Path(f"{restore_path}-wal"), Path(f"{restore_path}-shm")):
+            leftover.unlink(missing_ok=True)
+    
+    def _verify_database(self, db_file, expected_rows, full_check):
+        conn = sqlite3.connect(str(db_file))
+        try:
+            check = "integrity_check" if full_check else "quick_check"
+            result = conn.execute(f"PRAGMA {check}").fetchone()[0]
+            if result != "ok":
+                raise ValueError(f"{check} falhou: {result}")
+            
+            if expected_rows is not None:
+                rows = conn.execute("SELECT COUNT(*) FROM books").fetchone()[0]
+                if rows != expected_rows:
+                    raise ValueError(f"backup com {rows} livros, esperado {expected_rows}")
+        finally:
+            conn.close()
+    
+    def _swap_into_place(self, restore_path, db_manager=None):
+        """
+        Substitui o banco pelo arquivo verificado, guardando o banco atual
+        como pre_restore_<data>.db (só as max_pre_restore cópias mais recentes
+        são mantidas).
+        """
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        # O contador passa do maior já usado no mesmo segundo (não reaproveita nomes
+        # liberados pela retenção), para que a cópia nova seja sempre a mais recente
+        counters = [counter for (copy_time, counter), _ in self._pre_restore_copies() if copy_time == timestamp]
+        if counters:
+            previous = self.source_db.parent / f"pre_restore_{timestamp}_{max(counters) + 1}.db"
+        else:
+            previous = self.source_db.parent / f"pre_restore_{timestamp}.db"
+        wal_path = Path(f"{self.source_db}-wal")
+        
+        with db_manager.offline() if db_manager else nullcontext():
+            if self.source_db.exists():
+                if wal_path.exists() and wal_path.stat().st_size:
+                    # Há transações ainda no WAL: a cópia precisa passar pelo SQLite
+                    self._online_copy(self.source_db, previous)
+                else:
+                    try:
+                        # Sem WAL pendente o arquivo atual já está completo: basta um hard link
+                        os.link(self.source_db, previous)
+                    except OSError:
+                        self._online_copy(self.source_db, previous)
+            
+            os.replace(restore_path, self.source_db)
+            for suffix in ("-wal", "-shm"):
+                Path(f"{self.source_db}{suffix}").unlink(missing_ok=True)
+        
+        self.cleanup_pre_restore()
+    
+    def cleanup_pre_restore(self, max_copies=None):
+        if max_copies is None:
+            max_copies = self.max_pre_restore
+        
+        copies = self._pre_restore_copies()
+        for _, old_copy in copies[:max(len(copies) - max_copies, 0)]:
+            try:
+                old_copy.unlink()
+                self.logger.info(f"Cópia anterior à restauração removida: {old_copy.name}")
+            except OSError as e:
+                self.logger.error(f"Erro ao remover {old_copy.name}: {e}")
+    
+    def _pre_restore_copies(self):
+        """
+        Lista as cópias pre_restore_*.db da mais antiga para a mais recente, pela
+        data e contador no nome: uma cópia feita por hard link mantém a data de
+        modificação do banco de origem.
         
-        total_bytes = sum(f.stat().st_size for f in self.backup_dir.glob("backup_*.db"))
+        Returns:
+            list: ((data, contador), caminho) de cada cópia
+        """
+        copies = []
+        for path in self.source_db.parent.glob("pre_restore_*.db"):
+            match = PRE_RESTORE_PATTERN.fullmatch(path.name)
+            if match:
+                copies.append(((match.group(1), int(match.group(2) or 0)), path))
+        return sorted(copies)
+    
+    def get_backup_size_total(self):
+        index = self._load_index()
+        total_bytes = sum(entry['stored_bytes'] for entry in index['backups'])
+        total_bytes += index['chunk_store_bytes']
         
         return {
             'bytes': total_bytes,
@@ -0,0 +1,373 @@
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import Manager
+from pathlib import Path
+from queue import Empty
+import logging
+import os
+import shutil
+
+from services.csv_service import CSVService, RejectsFile
+from services.validation_service import ValidationService
+
+
+def _parse_file(filepath, chunk_rows, queue, skip_until=1):
+    """
+    Lê e valida um arquivo CSV em um processo separado, enviando os livros
+    válidos e os erros em blocos para o processo principal, que é o único
+    a gravar no banco. Linhas até skip_until já foram gravadas em uma
+    execução anterior e são descartadas.
+    """
+    name = Path(filepath).name
+    validator = ValidationService.compile()
+    try:
+        reader = CSVService.read_csv_chunks(filepath, chunk_rows)
+        with reader:
+            for chunk in reader:
+                # +2: o índice do pandas começa em 0 e a linha 1 é o cabeçalho
+                last_line = int(chunk.index[-1]) + 2
+                chunk = chunk[chunk.index + 2 > skip_until]
+                if chunk.empty:
+                    continue
+                rows, errors = CSVService.prepare_frame(chunk, first_line=2, validator=validator)
+                # Só as contagens do bloco atravessam a fila; o escritor as soma por arquivo
+                queue.put(('rows', name, rows, errors, dict(validator.violations), last_line))
+                validator.violations.clear()
+    except Exception as e:
+        queue.put(('failed', name, str(e)))
+        return
+    queue.put(('done', name))
+
+
+class BatchImportService:
+    """
+    Importa de uma vez todos os CSVs pendentes da pasta imports.
+
+    A leitura e a validação rodam em paralelo em um pool de processos; os livros
+    válidos passam por uma fila limitada até um único escritor, que grava lotes
+    grandes (o SQLite aceita apenas um escritor por vez). Cada lote grava, na
+    mesma transação, o checkpoint de cada arquivo (como em CSVService.import_from_csv):
+    um arquivo que falhar no meio continua de onde parou na próxima execução.
+    Cada arquivo concluído é registrado pelo fingerprint e movido para imports/archive.
+
+    Args:
+        database_manager: DatabaseManager usado para gravar
+        workers: Processos de leitura (padrão: número de CPUs)
+        write_batch_size: Livros por transação de gravação
+        chunk_rows: Linhas lidas por vez em cada arquivo
+        queue_size: Blocos em trânsito entre leitores e escritor
+    """
+
+    IGNORED_FILES = {"template_import.csv"}
+
+    def __init__(self, database_manager, workers=None, write_batch_size=10000,
+                 chunk_rows=5000, queue_size=16):
+        self.db_manager = database_manager
+        self.workers = workers or os.cpu_count() or 1
+        self.write_batch_size = write_batch_size
+        self.chunk_rows = chunk_rows
+        self.queue_size = queue_size
+        self.imports_dir = Path("imports")
+        self.archive_dir = self.imports_dir / "archive"
+        self.logger = logging.getLogger(__name__)
+
+    def pending_files(self):
+        # Subpastas (archive, rejects) ficam de fora porque o glob não é recursivo
+        return sorted(
+            path for path in self.imports_dir.glob("*.csv")
+            if path.is_file() and path.name not in self.IGNORED_FILES
+        )
+
+    def import_pending(self, upsert=False, natural_key=None, on_progress=None):
+        """
+        Importa todos os arquivos pendentes.
+
+        Args:
+            upsert: Atualiza livros existentes pela chave natural em vez de duplicá-los
+            natural_key: Chave natural do modo upsert (ver DatabaseManager.upsert_books)
+            on_progress: Callback opcional chamado com o progresso agregado
+                (files_done, files_total, imported, failed e, no modo upsert,
+                inserted, updated e unchanged)
+
+        Returns:
+            dict: files (resumo por arquivo), imported, failed, violations
+                (linhas recusadas por regra de validação) e seconds; no modo
+                upsert também inserted, updated e unchanged, no total e por arquivo
+        """
+        started = datetime.now()
+        files = {}
+        to_parse = []
+        upsert_counts = dict.fromkeys(('inserted', 'updated', 'unchanged'), 0) if upsert else {}
+
+        for path in self.pending_files():
+            fingerprint = CSVService.file_fingerprint(path)
+            summary = {
+                'path': path,
+                'fingerprint': fingerprint,
+                'status': "pending",
+                'imported': 0,
+                'failed': 0,
+                **upsert_counts,
+                'errors': [],
+                'violations': Counter(),
+                'rejects': RejectsFile(path.name, CSVService.IMPORT_COLUMNS),
+                'rejects_file': None,
+                'pending_rows': 0,
+                'received_line': 1,
+                'checkpoint_failed': 0,
+                'checkpoint': {
+                    'fingerprint': fingerprint,
+                    'filename': path.name,
+                    'status': "running",
+                    'byte_offset': None,
+                    'line': 1,
+                    'batch_id': 0,
+                    'imported': 0,
+                    'failed': 0
+                }
+            }
+            files[path.name] = summary
+
+            previous = self.db_manager.get_import_checkpoint(fingerprint)
+            if previous and previous['status'] == "completed":
+                summary['status'] = "skipped"
+                self._archive(summary)
+                continue
+
+            if previous and previous['status'] == "running":
+                # Interrompido em uma execução anterior: continua após a última linha gravada
+                summary['checkpoint'].update(previous, filename=path.name, byte_offset=None)
+                summary['received_line'] = previous['line']
+                summary['resumed_from_line'] = previous['line']
+                self.logger.info(f"Retomando importação de {path.name} após a linha {previous['line']}")
+            to_parse.append(path)
+
+        # Só para montar as mensagens: as regras já foram avaliadas nos processos de leitura
+        self.validator = ValidationService.compile()
+
+        if upsert:
+            natural_key = tuple(natural_key or self.db_manager.DEFAULT_NATURAL_KEY)
+            self.db_manager.ensure_unique_key(natural_key)
+
+        totals = {'imported': 0, 'failed': 0, **upsert_counts}
+        violations = Counter()
+
+        def report():
+            if on_progress:
+                on_progress({
+                    'files_done': sum(1 for f in files.values() if f['status'] not in ("pending", "parsed")),
+                    'files_total': len(files),
+                    **totals
+                })
+
+        try:
+            if to_parse:
+                with Manager() as manager:
+                    queue = manager.Queue(maxsize=self.queue_size)
+                    with ProcessPoolExecutor(max_workers=min(self.workers, len(to_parse))) as pool:
+                        futures = [
+                            pool.submit(
+                                _parse_file, str(path), self.chunk_rows, queue,
+                                files[path.name]['checkpoint']['line']
+                            )
+                            for path in to_parse
+                        ]
+                        self._write_from_queue(queue, futures, files, totals, upsert, natural_key, report)
+                        for future in futures:
+                            future.result()
+        finally:
+            for summary in files.values():
+                self._close_rejects(summary)
+
+        report()
+        for summary in files.values():
+            violations.update(summary['violations'])
+        elapsed = (datetime.now() - started).total_seconds()
+        self.logger.info(
+            f"Importação em lote: {len(files)} arquivo(s), {totals['imported']} livros importados, "
+            f"{totals['failed']} com erro, em {elapsed:.1f}s"
+        )
+        return {
+            'files': [
+                {
+                    'name': name,
+                    **{
+                        key: value for key, value in summary.items()
+                        if key not in (
+                            'path', 'pending_rows', 'received_line', 'checkpoint_failed',
+                            'fingerprint', 'rejects', 'checkpoint'
+                        )
+                    }
+                }
+                for name, summary in files.items()
+            ],
+            **totals,
+            'violations': violations,
+            'seconds': round(elapsed, 2)
+        }
+
+    def _write_from_queue(self, queue, futures, files, totals, upsert, natural_key, report):
+        # Escritor único: junta blocos de vários arquivos em lotes grandes
+        batch = []
+        running = len(futures)
+
+        while running:
+            try:
+                message = queue.get(timeout=1)
+            except Empty:
+                if all(future.done() for future in futures):
+                    # Um processo de leitura terminou sem avisar (ex.: foi encerrado)
+                    break
+                continue
+            running -= self._handle_message(message, files, totals, batch)
+            if len(batch) >= self.write_batch_size:
+                self._flush(batch, files, totals, upsert, natural_key)
+                batch.clear()
+                report()
+            self._finish_files(files)
+
+        # Uma mensagem posta logo antes de o processo terminar pode ainda estar na fila
+        while True:
+            try:
+                message = queue.get_nowait()
+            except Empty:
+                break
+            self._handle_message(message, files, totals, batch)
+
+        self._flush(batch, files, totals, upsert, natural_key)
+        self._finish_files(files)
+
+    def _handle_message(self, message, files, totals, batch):
+        """
+        Processa uma mensagem de um processo de leitura, acumulando os livros em batch.
+
+        Returns:
+            int: 1 se a mensagem encerra a leitura de um arquivo, senão 0
+        """
+        kind, name = message[0], message[1]
+        summary = files[name]
+
+        if kind == 'rows':
+            _, _, rows, errors, chunk_violations, last_line = message
+            summary['violations'].update(chunk_violations)
+            summary['received_line'] = last_line
+            for row_num, values, rules in errors:
+                self._register_error(summary, totals, row_num, "; ".join(self.validator.messages(rules)), values)
+            batch.extend((name, *row) for row in rows)
+            summary['pending_rows'] += len(rows)
+            return 0
+
+        if kind == 'failed':
+            summary['status'] = "failed"
+            summary['errors'].append(f"Erro ao ler o arquivo: {message[2]}")
+            self.logger.error(f"Erro ao ler {name}: {message[2]}")
+        else:
+            summary['status'] = "parsed"
+        return 1
+
+    def _flush(self, batch, files, totals, upsert, natural_key):
+        # Uma transação por arquivo presente no lote, para gravar junto o checkpoint dele
+        by_file = {}
+        for name, *row in batch:
+            by_file.setdefault(name, []).append(row)
+
+        for name, rows in by_file.items():
+            self._flush_file(files[name], rows, totals, upsert, natural_key)
+
+    def _flush_file(self, summary, rows, totals, upsert, natural_key):
+        checkpoint = summary['checkpoint']
+        imported_before = checkpoint['imported']
+        failed_before = checkpoint['failed']
+        folded_before = summary['checkpoint_failed']
+        # Todos os livros recebidos do arquivo estão neste lote: a leitura pode continuar após received_line
+        checkpoint.update(
+            line=summary['received_line'],
+            batch_id=checkpoint['batch_id'] + 1,
+            imported=imported_before + len(rows),
+            failed=failed_before + summary['failed'] - summary['checkpoint_failed']
+        )
+        summary['checkpoint_failed'] = summary['failed']
+
+        values = [row_values for _, row_values, _ in rows]
+        duplicates = set()
+        try:
+            if upsert:
+                counts = self.db_manager.upsert_books(
+                    values, natural_key=natural_key, batch_size=len(values), checkpoint=checkpoint
+                )
+                for key, count in counts.items():
+                    summary[key] += count
+                    totals[key] += count
+            else:
+                self.db_manager.add_books(
+                    values, batch_size=len(values), checkpoint=checkpoint, on_duplicates=duplicates.update
+                )
+            if duplicates:
+                duplicate_message = CSVService.DUPLICATE_MESSAGE.format(key=self.db_manager.describe_unique_keys())
+            for position, (row_num, _, raw) in enumerate(rows):
+                if position in duplicates:
+                    summary['violations'][CSVService.DUPLICATE] += 1
+                    self._register_error(summary, totals, row_num, duplicate_message, raw)
+                else:
+                    summary['imported'] += 1
+            totals['imported'] += len(rows) - len(duplicates)
+            # Os duplicados já foram contados no checkpoint por add_books
+            summary['checkpoint_failed'] = summary['failed']
+        except Exception as e:
+            # O lote foi desfeito, inclusive o checkpoint: cada linha dele conta como falha
+            checkpoint.update(imported=imported_before, failed=failed_before)
+            summary['checkpoint_failed'] = folded_before
+            self.logger.error(
+                f"Falha ao gravar {len(rows)} livro(s) de {summary['path'].name} "
+                f"(linhas {rows[0][0]} a {rows[-1][0]}): {e}"
+            )
+            for row_num, _, raw in rows:
+                summary['violations'][CSVService.WRITE_ERROR] += 1
+                self._register_error(
+                    summary, totals, row_num, CSVService.WRITE_ERROR_MESSAGE, raw, level=logging.ERROR
+                )
+
+        summary['pending_rows'] -= len(rows)
+
+    def _finish_files(self, files):
+        # Um arquivo termina quando foi lido por completo e todos os seus livros foram gravados
+        for summary in files.values():
+            if summary['status'] == "parsed" and summary['pending_rows'] == 0:
+                summary['status'] = "imported"
+                self._close_rejects(summary)
+                checkpoint = summary['checkpoint']
+                checkpoint.update(
+                    status="completed",
+                    line=summary['received_line'],
+                    failed=checkpoint['failed'] + summary['failed'] - summary['checkpoint_failed']
+                )
+                self.db_manager.save_import_checkpoint(checkpoint)
+                self._archive(summary)
+
+    def _register_error(self, summary, totals, row_num, message, values, level=logging.WARNING):
+        summary['failed'] += 1
+        totals['failed'] += 1
+        summary['rejects'].add(row_num, values, message)
+
+        if len(summary['errors']) < CSVService.ERROR_SAMPLE_SIZE:
+            error_msg = f"{summary['path'].name}, linha {row_num}: {message}"
+            summary['errors'].append(error_msg)
+            self.logger.log(level, error_msg)
+
+    @staticmethod
+    def _close_rejects(summary):
+        # O arquivo de rejeitados fica em imports/rejects, fora do glob de pendentes
+        rejects_file = summary['rejects'].close()
+        if rejects_file:
+            summary['rejects_file'] = rejects_file
+
+    def _archive(self, summary):
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        path = summary['path']
+        target = self.archive_dir / path.name
+        if target.exists():
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            target = self.archive_dir / f"{path.stem}_{timestamp}{path.suffix}"
+        shutil.move(str(path), str(target))
+        summary['archived_to'] = str(target)
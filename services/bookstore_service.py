@@ -1,15 +1,23 @@
 from services.database_manager import DatabaseManager
 from services.backup_service import BackupService
+from services.backup_scheduler import BackupScheduler
 from services.csv_service import CSVService
+from services.batch_import_service import BatchImportService
+from services.export_service import ExportService
 from services.report_service import ReportService
+from services.validation_service import ValidationService
+from pathlib import Path
 import logging
 
 class BookstoreService:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
-        self.db_manager = DatabaseManager()
+        self.db_manager = DatabaseManager(cache_statistics=True)
         self.backup_service = BackupService()
+        self.backup_scheduler = BackupScheduler(self.backup_service)
         self.csv_service = CSVService(self.db_manager)
+        self.export_service = ExportService(self.db_manager, self.csv_service)
+        self.batch_import_service = BatchImportService(self.db_manager)
         self.report_service = ReportService(self.db_manager)
         
         self.logger.info("BookstoreService inicializado com sucesso")
@@ -18,7 +26,7 @@ class BookstoreService:
         try:
             added_book = self.db_manager.add_book(book)
 
-            self.backup_service.create_backup()
+            self.backup_scheduler.mark_dirty()
             
             return True, "Livro adicionado com sucesso!", added_book
             
@@ -33,6 +41,15 @@ class BookstoreService:
             self.logger.error(f"Erro ao buscar livros: {e}")
             return []
     
+    def get_books_page(self, page_size=20, after_id=None, order_by="id", after_value=None):
+        try:
+            return self.db_manager.get_page(
+                page_size, after_id=after_id, order_by=order_by, after_value=after_value
+            )
+        except Exception as e:
+            self.logger.error(f"Erro ao buscar página de livros: {e}")
+            return {'books': [], 'next_after_id': None, 'next_after_value': None, 'has_more': False}
+    
     def get_book_by_id(self, book_id):
         try:
             return self.db_manager.get_book_by_id(book_id)
@@ -52,7 +69,7 @@ class BookstoreService:
             success = self.db_manager.update_book(book_id, **updates)
             
             if success:
-                self.backup_service.create_backup()
+                self.backup_scheduler.mark_dirty()
                 
                 updated_fields = ", ".join(updates.keys())
                 return True, f"Livro atualizado com sucesso! Campos alterados: {updated_fields}"
@@ -72,7 +89,7 @@ class BookstoreService:
             success = self.db_manager.delete_book(book_id)
             
             if success:
-                self.backup_service.create_backup()
+                self.backup_scheduler.mark_dirty()
                 return True, "Livro removido com sucesso!"
             else:
                 return False, "Erro ao remover livro."
@@ -81,6 +98,42 @@ class BookstoreService:
             self.logger.error(f"Erro ao remover livro: {e}")
             return False, f"Erro ao remover livro: {str(e)}"
     
+    def bulk_update_books(self, filters, **changes):
+        try:
+            count = self.db_manager.update_books(filters, **changes)
+            
+            if count:
+                self.backup_scheduler.mark_dirty(writes=count)
+            
+            return True, f"{count} livro(s) atualizado(s).", count
+        except Exception as e:
+            self.logger.error(f"Erro na atualização em lote: {e}")
+            return False, f"Erro na atualização em lote: {str(e)}", 0
+    
+    def reprice_books(self, filters, percent=None, absolute=None):
+        try:
+            count = self.db_manager.reprice(filters, percent=percent, absolute=absolute)
+            
+            if count:
+                self.backup_scheduler.mark_dirty(writes=count)
+            
+            return True, f"{count} livro(s) reajustado(s).", count
+        except Exception as e:
+            self.logger.error(f"Erro no reajuste de preços: {e}")
+            return False, f"Erro no reajuste de preços: {str(e)}", 0
+    
+    def bulk_delete_books(self, ids=None, filters=None):
+        try:
+            count = self.db_manager.delete_books(ids=ids, filters=filters)
+            
+            if count:
+                self.backup_scheduler.mark_dirty(writes=count)
+            
+            return True, f"{count} livro(s) removido(s).", count
+        except Exception as e:
+            self.logger.error(f"Erro na remoção em lote: {e}")
+            return False, f"Erro na remoção em lote: {str(e)}", 0
+    
     def search_by_author(self, author):
         try:
             return self.db_manager.search_books_by_author(author)
@@ -95,9 +148,44 @@ class BookstoreService:
             self.logger.error(f"Erro na busca avançada: {e}")
             return []
     
-    def export_to_csv(self, filename=None):
+    def rebuild_search_index(self):
+        try:
+            if self.db_manager.rebuild_search_index():
+                return True, "Índice de busca reconstruído com sucesso!"
+            else:
+                return False, "Não foi possível reconstruir o índice de busca."
+        except Exception as e:
+            self.logger.error(f"Erro ao reconstruir índice de busca: {e}")
+            return False, f"Erro ao reconstruir índice de busca: {str(e)}"
+    
+    def export_to_csv(self, filename=None, compress=False):
+        try:
+            filepath = self.csv_service.export_to_csv(filename, compress=compress)
+            if filepath:
+                return True, f"Dados exportados para: {filepath}"
+            else:
+                return False, "Erro ao exportar dados."
+        except Exception as e:
+            self.logger.error(f"Erro na exportação: {e}")
+            return False, f"Erro ao exportar: {str(e)}"
+    
+    def export_incremental(self, feed="default"):
+        try:
+            result = self.csv_service.export_incremental(feed)
+            if result:
+                return True, (
+                    f"Alterações exportadas para: {result['path']} "
+                    f"({result['upserts']} inseridos/alterados, {result['deletes']} removidos)"
+                )
+            else:
+                return False, "Erro ao exportar alterações."
+        except Exception as e:
+            self.logger.error(f"Erro na exportação incremental: {e}")
+            return False, f"Erro ao exportar: {str(e)}"
+    
+    def export_data(self, file_format, filename=None):
         try:
-            filepath = self.csv_service.export_to_csv(filename)
+            filepath = self.export_service.export(file_format, filename)
             if filepath:
                 return True, f"Dados exportados para: {filepath}"
             else:
@@ -106,33 +194,142 @@ class BookstoreService:
             self.logger.error(f"Erro na exportação: {e}")
             return False, f"Erro ao exportar: {str(e)}"
     
-    def import_from_csv(self, filename="books.csv"):
+    def import_from_csv(self, filename="books.csv", chunksize=None, resume=True, upsert=False):
         try:
-            result = self.csv_service.import_from_csv(filename)
+            if Path(filename).suffix.lower() in ExportService.FORMATS_BY_SUFFIX:
+                result = self.export_service.import_file(filename, upsert=upsert)
+            else:
+                # Por padrão continua uma importação interrompida em vez de duplicar os livros
+                result = self.csv_service.import_from_csv(
+                    filename, chunksize=chunksize, resume=resume, upsert=upsert
+                )
+            
+            if result.get('skipped'):
+                return True, "Arquivo já importado anteriormente, sem alterações. Nada a fazer.", result
             
             if result['success'] and result['imported'] > 0:
-                self.backup_service.create_backup()
+                if 'natural_key' in result:
+                    writes = result['inserted'] + result['updated']
+                else:
+                    writes = result['imported']
+                if writes:
+                    self.backup_scheduler.mark_dirty(writes=writes)
                 
                 message = f"Importação concluída!\n"
+                if result.get('resumed_from_line'):
+                    message += f"  • Retomada após a linha {result['resumed_from_line']}\n"
                 message += f"  • Importados: {result['imported']}\n"
+                if 'natural_key' in result:
+                    message += f"    - Novos: {result['inserted']}\n"
+                    message += f"    - Atualizados: {result['updated']}\n"
+                    message += f"    - Sem alteração: {result['unchanged']}\n"
                 message += f"  • Falharam: {result['failed']}"
+                message += self._format_violations(result.get('violations'))
+                
+                batches = result.get('batches', [])
+                if batches:
+                    total_seconds = sum(batch['seconds'] for batch in batches)
+                    if total_seconds > 0:
+                        message += f"\n  • Lotes gravados: {len(batches)} "
+                        message += f"({result['imported'] / total_seconds:.0f} livros/s)"
                 
                 if result['errors']:
                     message += f"\n\nErros encontrados:\n"
                     for error in result['errors'][:5]:  # Mostra apenas os 5 primeiros erros
                         message += f"  • {error}\n"
                     
-                    if len(result['errors']) > 5:
-                        message += f"  ... e mais {len(result['errors']) - 5} erro(s)\n"
+                    if result['failed'] > 5:
+                        message += f"  ... e mais {result['failed'] - 5} erro(s)\n"
+                
+                if result.get('rejects_file'):
+                    message += f"\nLinhas recusadas (corrija e importe de novo): {result['rejects_file']}"
                 
                 return True, message, result
             else:
-                return False, result.get('message', 'Erro ao importar'), result
+                if result['success']:
+                    message = f"Nenhum livro importado. Falharam: {result['failed']}"
+                    message += self._format_violations(result.get('violations'))
+                else:
+                    message = result.get('message', 'Erro ao importar')
+                if result.get('rejects_file'):
+                    message += f"\nLinhas recusadas (corrija e importe de novo): {result['rejects_file']}"
+                return False, message, result
                 
         except Exception as e:
             self.logger.error(f"Erro na importação: {e}")
             return False, f"Erro ao importar: {str(e)}", {}
     
+    def import_pending_files(self, upsert=False, on_progress=None):
+        try:
+            summary = self.batch_import_service.import_pending(upsert=upsert, on_progress=on_progress)
+            
+            if not summary['files']:
+                return True, "Nenhum arquivo pendente na pasta imports.", summary
+            
+            if 'inserted' in summary:
+                writes = summary['inserted'] + summary['updated']
+            else:
+                writes = summary['imported']
+            if writes:
+                self.backup_scheduler.mark_dirty(writes=writes)
+            
+            message = f"Importação em lote concluída em {summary['seconds']:.1f}s!\n"
+            message += f"  • Importados: {summary['imported']}\n"
+            if 'inserted' in summary:
+                message += f"    - Novos: {summary['inserted']}\n"
+                message += f"    - Atualizados: {summary['updated']}\n"
+                message += f"    - Sem alteração: {summary['unchanged']}\n"
+            message += f"  • Falharam: {summary['failed']}"
+            message += self._format_violations(summary['violations'])
+            message += "\n"
+            
+            status_labels = {
+                'imported': "importado",
+                'skipped': "já importado antes",
+                'failed': "erro na leitura"
+            }
+            for file_summary in summary['files']:
+                label = status_labels.get(file_summary['status'], file_summary['status'])
+                message += (
+                    f"\n  {file_summary['name']}: {label} "
+                    f"({file_summary['imported']} importados, {file_summary['failed']} com erro)"
+                )
+                if 'inserted' in file_summary and file_summary['imported']:
+                    message += (
+                        f"\n    {file_summary['inserted']} novos, {file_summary['updated']} atualizados, "
+                        f"{file_summary['unchanged']} sem alteração"
+                    )
+                if file_summary.get('resumed_from_line'):
+                    message += f"\n    Retomado após a linha {file_summary['resumed_from_line']}"
+                for error in file_summary['errors'][:3]:  # Mostra apenas os 3 primeiros erros por arquivo
+                    message += f"\n    - {error}"
+                if file_summary['failed'] > 3:
+                    message += f"\n    ... e mais {file_summary['failed'] - 3} erro(s)"
+                if file_summary['rejects_file']:
+                    message += f"\n    Linhas recusadas: {file_summary['rejects_file']}"
+            
+            return True, message, summary
+        except Exception as e:
+            self.logger.error(f"Erro na importação em lote: {e}")
+            return False, f"Erro na importação em lote: {str(e)}", {}
+    
+    def _format_violations(self, violations):
+        # Ex.: "12431 linha(s): O título não pode ter mais de 80 caracteres. [title-length]"
+        if not violations:
+            return ""
+        
+        validator = ValidationService.compile()
+        message = "\n  • Recusados por regra:"
+        for rule, count in sorted(violations.items(), key=lambda item: -item[1]):
+            if rule == CSVService.WRITE_ERROR:
+                reason = CSVService.WRITE_ERROR_MESSAGE
+            elif rule == CSVService.DUPLICATE:
+                reason = CSVService.DUPLICATE_MESSAGE.format(key=self.db_manager.describe_unique_keys())
+            else:
+                reason = validator.message(rule)
+            message += f"\n    - {count} linha(s): {reason} [{rule}]"
+        return message
+    
     def create_manual_backup(self):
         try:
             backup_path = self.backup_service.create_backup()
@@ -144,6 +341,26 @@ class BookstoreService:
             self.logger.error(f"Erro ao criar backup: {e}")
             return False, f"Erro ao criar backup: {str(e)}"
     
+    def restore_backup(self, backup_name):
+        try:
+            # Escritas pendentes entram no backup antes de o banco ser substituído
+            self.backup_scheduler.flush()
+            if self.backup_service.restore_backup(backup_name, db_manager=self.db_manager):
+                return True, f"Backup restaurado: {backup_name}"
+            else:
+                return False, "Backup inválido ou corrompido. O banco atual foi mantido."
+        except Exception as e:
+            self.logger.error(f"Erro ao restaurar backup: {e}")
+            return False, f"Erro ao restaurar backup: {str(e)}"
+
+    def get_backup_metrics(self):
+        return self.backup_scheduler.get_metrics()
+    
+    def close(self):
+        # Garante o backup das escritas pendentes antes de encerrar
+        self.backup_scheduler.stop()
+        self.db_manager.close()
+    
     def list_backups(self):
         try:
             return self.backup_service.list_backups()
@@ -151,10 +368,12 @@ class BookstoreService:
             self.logger.error(f"Erro ao listar backups: {e}")
             return []
     
-    def generate_html_report(self):
+    def generate_html_report(self, page_size=None):
         try:
-            filepath = self.report_service.generate_html_report()
+            filepath = self.report_service.generate_html_report(page_size=page_size)
             if filepath:
+                if page_size:
+                    return True, f"Relatório HTML gerado: {filepath} (índice das páginas do catálogo)"
                 return True, f"Relatório HTML gerado: {filepath}"
             else:
                 return False, "Erro ao gerar relatório."
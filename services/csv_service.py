@@ -1,46 +1,246 @@
+import codecs
 import csv
+import gzip
+import hashlib
 import pandas as pd
 from pathlib import Path
 from datetime import datetime
-from models.book import Book
+from itertools import islice
 from services.validation_service import ValidationService
 import logging
+import os
+
+class RejectsFile:
+    """
+    CSV com as linhas recusadas de uma importação, gravado em imports/rejects
+    à medida que elas aparecem. Tem as colunas de importação com os valores
+    originais, mais line e reasons; depois de corrigido, pode ser importado de
+    novo (as colunas extras são ignoradas). Só é criado se alguma linha for recusada.
+    """
+    
+    def __init__(self, source_name, columns, rejects_dir="imports/rejects"):
+        self.source = Path(source_name)
+        self.columns = columns
+        self.rejects_dir = Path(rejects_dir)
+        self.path = None
+        self.count = 0
+        self._file = None
+        self._writer = None
+    
+    def add(self, line, values, reasons):
+        if self._writer is None:
+            self.rejects_dir.mkdir(parents=True, exist_ok=True)
+            self._file = self._open_new()
+            self._writer = csv.writer(self._file, lineterminator='\n')
+            self._writer.writerow([*self.columns, 'line', 'reasons'])
+        
+        self._writer.writerow([*('' if value is None else value for value in values), line, reasons])
+        self.count += 1
+    
+    def _open_new(self):
+        # Duas importações no mesmo segundo não podem sobrescrever os rejeitados uma da outra:
+        # o modo 'x' falha se o arquivo existe, e então o nome ganha um contador
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.path = self.rejects_dir / f"{self.source.stem}_rejects_{timestamp}.csv"
+        counter = 1
+        while True:
+            try:
+                return open(self.path, 'x', encoding='utf-8-sig', newline='')
+            except FileExistsError:
+                self.path = self.rejects_dir / f"{self.source.stem}_rejects_{timestamp}_{counter}.csv"
+                counter += 1
+    
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        return str(self.path) if self.path else None
+
 
 class CSVService:
+    IMPORT_COLUMNS = ['title', 'author', 'publication_year', 'price']
+    EXPORT_COLUMNS = ['id', 'title', 'author', 'publication_year', 'price', 'created_at']
+    # Mensagens de erro guardadas em memória; as demais linhas recusadas ficam só no arquivo de rejeitados
+    ERROR_SAMPLE_SIZE = 100
+    # Motivo contado junto com as regras de validação quando um lote não pôde ser gravado
+    WRITE_ERROR = "database-write"
+    # Motivo curto e fixo: a exceção completa (com o SQL e os parâmetros) vai uma vez para o log
+    WRITE_ERROR_MESSAGE = "Falha ao gravar o lote."
+    # Livro ignorado no modo normal por já existir pela chave única criada no modo upsert
+    DUPLICATE = "duplicate"
+    # {key}: colunas dos índices únicos (ver DatabaseManager.describe_unique_keys)
+    DUPLICATE_MESSAGE = "Livro já cadastrado com a mesma chave ({key})."
 
     def __init__(self, database_manager):
         self.db_manager = database_manager
-        self.validator = ValidationService()
+        self.validator = ValidationService.compile()
+        self.rejects = None
         self.logger = logging.getLogger(__name__)
         
         Path("exports").mkdir(exist_ok=True)
         Path("imports").mkdir(exist_ok=True)
     
-    def export_to_csv(self, filename=None):
+    def export_to_csv(self, filename=None, compress=False, chunk_size=5000, on_progress=None):
+        """
+        Exporta o catálogo lendo o banco em blocos e gravando cada bloco direto
+        no arquivo, sem carregar a tabela inteira na memória.
+        
+        Args:
+            filename: Nome do arquivo (padrão: books_export_<data>.csv)
+            compress: Grava o arquivo compactado com gzip (.csv.gz)
+            chunk_size: Linhas lidas do banco por vez
+            on_progress: Callback opcional chamado a cada bloco com
+                {'rows': linhas gravadas, 'total': total de linhas}
+            
+        Returns:
+            str: Caminho do arquivo gerado ou None em caso de erro
+        """
         try:
             if filename is None:
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 filename = f"books_export_{timestamp}.csv"
             
-            filepath = Path("exports") / filename
-            
-            # Lê os dados do banco usando pandas
-            df = pd.read_sql_table(
-                "books", 
-                self.db_manager.engine,
-                columns=['id', 'title', 'author', 'publication_year', 'price', 'created_at']
-            )
-            
-            df.to_csv(filepath, index=False, encoding='utf-8-sig')
+            filepath = self._export_path(filename, compress)
+            total = self.db_manager.count_books()
+            batches = self.db_manager.iter_row_chunks(self.EXPORT_COLUMNS, chunk_size)
+            rows = self._write_csv(filepath, batches, compress, on_progress, total)
             
-            self.logger.info(f"Dados exportados com sucesso: {filepath}")
+            self.logger.info(f"Dados exportados com sucesso: {filepath} ({rows} livros)")
             return str(filepath)
             
         except Exception as e:
             self.logger.error(f"Erro ao exportar CSV: {e}")
             return None
     
-    def import_from_csv(self, filename="books_import.csv"):
+    def export_incremental(self, feed="default", filename=None, compress=False,
+                           chunk_size=5000, on_progress=None):
+        """
+        Exporta apenas os livros inseridos, alterados ou removidos desde a última
+        exportação incremental do mesmo feed. A coluna op indica "upsert" ou
+        "delete"; as exclusões vêm primeiro. Na primeira execução o catálogo
+        inteiro é exportado.
+        
+        O arquivo é gravado com outro nome e renomeado quando completo, sem nunca
+        sobrescrever uma exportação existente; só então o watermark avança. Se algo falhar no meio, a próxima execução repete as mesmas
+        alterações.
+        
+        Returns:
+            dict: path, upserts, deletes, since e until, ou None em caso de erro
+        """
+        partial_path = None
+        try:
+            default_name = filename is None
+            if default_name:
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                filename = f"books_changes_{feed}_{timestamp}.csv"
+            
+            filepath = self._export_path(filename, compress)
+            partial_path = filepath.with_name(f"{filepath.name}.part")
+            since = self.db_manager.get_watermark(feed)
+            until = self.db_manager.change_high_watermark()
+            counts = {'upsert': 0, 'delete': 0}
+            
+            def count_ops(batches):
+                for rows in batches:
+                    for row in rows:
+                        counts[row[0]] += 1
+                    yield rows
+            
+            self._write_csv(
+                partial_path,
+                count_ops(self.db_manager.iter_changes(since, until, chunk_size)),
+                compress,
+                on_progress,
+                header=['op', *self.db_manager.CHANGE_COLUMNS]
+            )
+            # os.link falha se o destino já existe, então uma exportação anterior nunca é
+            # sobrescrita; com o nome padrão (precisão de segundos) o nome ganha um contador
+            counter = 1
+            while True:
+                try:
+                    os.link(partial_path, filepath)
+                    break
+                except FileExistsError:
+                    if not default_name:
+                        raise
+                    filepath = self._export_path(f"books_changes_{feed}_{timestamp}_{counter}.csv", compress)
+                    counter += 1
+            partial_path.unlink()
+            self.db_manager.set_watermark(feed, until)
+            
+            self.logger.info(
+                f"Exportação incremental '{feed}': {counts['upsert']} alterados, "
+                f"{counts['delete']} removidos ({filepath})"
+            )
+            return {
+                'path': str(filepath),
+                'upserts': counts['upsert'],
+                'deletes': counts['delete'],
+                'since': since,
+                'until': until
+            }
+            
+        except Exception as e:
+            self.logger.error(f"Erro na exportação incremental: {e}")
+            if partial_path is not None:
+                partial_path.unlink(missing_ok=True)
+            return None
+    
+    @staticmethod
+    def _export_path(filename, compress):
+        if compress and not filename.endswith(".gz"):
+            filename = f"{filename}.gz"
+        return Path("exports") / filename
+    
+    def _write_csv(self, filepath, batches, compress=False, on_progress=None, total=None, header=None):
+        """
+        Grava blocos de linhas em um CSV (ou CSV gzip), um bloco por vez.
+        
+        Returns:
+            int: Quantidade de linhas gravadas
+        """
+        written = 0
+        if compress:
+            # Nível 6: quase o mesmo tamanho do nível 9 na metade do tempo
+            file = gzip.open(filepath, 'wt', compresslevel=6, encoding='utf-8-sig', newline='')
+        else:
+            file = open(filepath, 'w', encoding='utf-8-sig', newline='')
+        
+        with file:
+            writer = csv.writer(file, lineterminator='\n')
+            writer.writerow(header or self.EXPORT_COLUMNS)
+            
+            for rows in batches:
+                writer.writerows(rows)
+                written += len(rows)
+                if on_progress:
+                    on_progress({'rows': written, 'total': total})
+        
+        return written
+    
+    def import_from_csv(self, filename="books_import.csv", batch_size=1000, chunksize=None,
+                        resume=False, force=False, upsert=False, natural_key=None):
+        """
+        Importa livros de um arquivo CSV da pasta imports.
+        
+        A cada lote gravado, um checkpoint (posição no arquivo, linha e lote) é
+        confirmado na mesma transação dos livros. Arquivos já importados por
+        completo, reconhecidos pelo fingerprint, são ignorados.
+        
+        Args:
+            filename: Nome do arquivo
+            batch_size: Quantidade de livros gravados por transação
+            chunksize: Se informado, lê o arquivo em blocos desse tamanho com pandas
+                e valida cada bloco de forma vetorizada (modo streaming)
+            resume: Continua uma importação interrompida a partir do último checkpoint
+            force: Importa mesmo que o arquivo já tenha sido importado
+            upsert: Atualiza os livros que já existem em vez de duplicá-los
+            natural_key: Colunas que identificam um livro no modo upsert
+                (padrão: título, autor e ano)
+            
+        Returns:
+            dict: Resumo da importação
+        """
         filepath = Path("imports") / filename
         
         if not filepath.exists():
@@ -50,84 +250,361 @@ class CSVService:
                 'message': 'Arquivo não encontrado',
                 'imported': 0,
                 'failed': 0,
-                'errors': []
+                'errors': [],
+                'batches': []
             }
         
-        imported_count = 0
-        failed_count = 0
-        errors = []
+        result = self.new_import_result(upsert, natural_key, source=filename)
         
         try:
-            with open(filepath, 'r', encoding='utf-8-sig') as file:
-                reader = csv.DictReader(file)
-                
-                for row_num, row in enumerate(reader, start=2):  # Linha 2 porque 1 é o cabeçalho
-                    try:
-                        title = row.get('title', '').strip().upper()
-                        author = row.get('author', '').strip().upper()
-                        year_str = row.get('publication_year', '').strip()
-                        price_str = row.get('price', '').strip()
-                        
-                        is_valid, validation_errors = self.validator.validate_book_data(
-                            title, author, year_str, price_str
-                        )
-                        
-                        if not is_valid:
-                            failed_count += 1
-                            error_msg = f"Linha {row_num}: " + "; ".join(validation_errors)
-                            errors.append(error_msg)
-                            self.logger.warning(error_msg)
-                            continue
-                        
-                        book = Book(
-                            title=title,
-                            author=author,
-                            publication_year=int(year_str),
-                            price=float(price_str)
-                        )
-                        
-                        self.db_manager.add_book(book)
-                        imported_count += 1
-                        
-                    except Exception as e:
-                        failed_count += 1
-                        error_msg = f"Linha {row_num}: {str(e)}"
-                        errors.append(error_msg)
-                        self.logger.error(error_msg)
+            if upsert:
+                self.db_manager.ensure_unique_key(result['natural_key'])
             
-            return {
-                'success': True,
-                'imported': imported_count,
-                'failed': failed_count,
-                'errors': errors
+            fingerprint = self.file_fingerprint(filepath)
+            previous = self.db_manager.get_import_checkpoint(fingerprint)
+            
+            if previous and previous['status'] == "completed" and not force:
+                self.logger.info(f"Arquivo já importado, sem alterações: {filepath}")
+                result.update(success=True, skipped=True, message="Arquivo já importado anteriormente.")
+                return result
+            
+            checkpoint = {
+                'fingerprint': fingerprint,
+                'filename': filename,
+                'status': "running",
+                'byte_offset': 0,
+                'line': 1,
+                'batch_id': 0,
+                'imported': 0,
+                'failed': 0
             }
             
+            if previous and previous['status'] == "running":
+                if resume:
+                    checkpoint.update(previous, filename=filename)
+                    result['imported'] = previous['imported']
+                    result['failed'] = previous['failed']
+                    result['resumed_from_line'] = previous['line']
+                    self.logger.info(f"Retomando importação de {filepath} após a linha {previous['line']}")
+                else:
+                    self.logger.warning(
+                        f"Importação anterior de {filepath} incompleta; reiniciando do começo "
+                        f"(use resume=True para continuar da linha {previous['line']})"
+                    )
+            
+            if chunksize:
+                self._import_chunks(filepath, chunksize, result, checkpoint)
+            else:
+                self._import_rows(filepath, batch_size, result, checkpoint)
+            
+            checkpoint.update(status="completed", imported=result['imported'], failed=result['failed'])
+            self.db_manager.save_import_checkpoint(checkpoint)
+            
+            result['success'] = True
+            return result
+            
         except Exception as e:
             self.logger.error(f"Erro ao importar CSV: {e}")
-            return {
-                'success': False,
-                'message': str(e),
-                'imported': imported_count,
-                'failed': failed_count,
-                'errors': errors
-            }
+            result['success'] = False
+            result['message'] = str(e)
+            return result
+        finally:
+            self.close_rejects(result)
+    
+    def new_import_result(self, upsert=False, natural_key=None, source="import.csv"):
+        """
+        Prepara o resumo de uma nova importação. errors guarda só uma amostra
+        das mensagens; violations conta as linhas recusadas por motivo e todas
+        elas vão para o arquivo de rejeitados (ver close_rejects).
+        """
+        # Cada importação compila seu validador: o ano máximo e os contadores valem só para ela
+        self.validator = ValidationService.compile()
+        self.rejects = RejectsFile(source, self.IMPORT_COLUMNS)
+        result = {
+            'imported': 0,
+            'failed': 0,
+            'errors': [],
+            'violations': self.validator.violations,
+            'rejects_file': None,
+            'batches': []
+        }
+        if upsert:
+            # A presença de natural_key faz os lotes serem gravados com upsert
+            result.update(
+                natural_key=list(natural_key or self.db_manager.DEFAULT_NATURAL_KEY),
+                inserted=0,
+                updated=0,
+                unchanged=0
+            )
+        return result
+    
+    @staticmethod
+    def file_fingerprint(filepath, sample_size=1024 * 1024):
+        """
+        Identifica o conteúdo de um arquivo sem lê-lo inteiro: tamanho, data de
+        modificação e SHA-256 do primeiro e do último MiB.
+        """
+        stat = filepath.stat()
+        digest = hashlib.sha256(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+        
+        with open(filepath, 'rb') as file:
+            digest.update(file.read(sample_size))
+            if stat.st_size > sample_size:
+                file.seek(max(sample_size, stat.st_size - sample_size))
+                digest.update(file.read())
+        
+        return digest.hexdigest()
+    
+    @staticmethod
+    def _tracked_lines(file, position):
+        # Decodifica o arquivo binário linha a linha, guardando quantos bytes já foram consumidos.
+        # O csv.reader só pede a próxima linha quando precisa, então a posição ao fim de
+        # cada registro é exatamente o início do próximo.
+        for raw_line in file:
+            position['offset'] += len(raw_line)
+            yield raw_line.decode('utf-8')
+    
+    def _import_rows(self, filepath, batch_size, result, checkpoint):
+        batch = []
+        position = {'offset': 0}
+        
+        with open(filepath, 'rb') as file:
+            if file.read(len(codecs.BOM_UTF8)) == codecs.BOM_UTF8:
+                position['offset'] = len(codecs.BOM_UTF8)
+            else:
+                file.seek(0)
+            
+            header = next(csv.reader(self._tracked_lines(file, position)), [])
+            
+            first_line = 2  # Linha 2 porque 1 é o cabeçalho
+            skip_until = 1
+            if checkpoint['line'] > 1:
+                if checkpoint['byte_offset'] is not None:
+                    # Retomada: pula direto para o byte seguinte ao último lote confirmado
+                    file.seek(checkpoint['byte_offset'])
+                    position['offset'] = checkpoint['byte_offset']
+                    first_line = checkpoint['line'] + 1
+                else:
+                    # Checkpoint gravado pelo modo pandas, sem posição em bytes
+                    skip_until = checkpoint['line']
+            
+            reader = csv.DictReader(self._tracked_lines(file, position), fieldnames=header)
+            # A chave leva a linha original junto, para o arquivo de rejeitados
+            records = (
+                ((row_num, row), row)
+                for row_num, row in enumerate(reader, start=first_line)
+                if row_num > skip_until
+            )
+            
+            def on_invalid(key, row, rules):
+                values = [row.get(column) for column in self.IMPORT_COLUMNS]
+                self._register_error(result, key[0], "; ".join(self.validator.messages(rules)), values)
+            
+            # O gerador é preguiçoso: ao receber um livro, a posição em bytes é o fim do seu registro
+            for (row_num, row), values in self.validator.iter_valid(records, on_invalid):
+                values['title'] = values['title'].upper()
+                values['author'] = values['author'].upper()
+                batch.append((row_num, values, [row.get(column) for column in self.IMPORT_COLUMNS]))
+                
+                if len(batch) >= batch_size:
+                    checkpoint.update(line=row_num, byte_offset=position['offset'])
+                    self._flush_batch(batch, result, checkpoint)
+                    batch = []
+            
+            checkpoint['byte_offset'] = position['offset']
+            if batch:
+                checkpoint['line'] = batch[-1][0]
+            self._flush_batch(batch, result, checkpoint)
+    
+    @staticmethod
+    def read_csv_chunks(filepath, chunksize):
+        # Tudo como texto: a conversão de tipos fica a cargo da validação
+        return pd.read_csv(
+            filepath,
+            dtype=str,
+            keep_default_na=False,
+            skip_blank_lines=True,
+            encoding='utf-8-sig',
+            chunksize=chunksize
+        )
+    
+    def _import_chunks(self, filepath, chunksize, result, checkpoint):
+        reader = self.read_csv_chunks(filepath, chunksize)
+        
+        with reader:
+            for chunk in reader:
+                # O índice do pandas continua entre os blocos; +2 compensa o cabeçalho.
+                # Na retomada, as linhas já confirmadas são lidas e descartadas.
+                chunk = chunk[chunk.index + 2 > checkpoint['line']]
+                if chunk.empty:
+                    continue
+                checkpoint.update(line=int(chunk.index[-1]) + 2, byte_offset=None)
+                self.import_frame(chunk, result, first_line=2, checkpoint=checkpoint)
     
-    def export_filtered_csv(self, books, filename=None):
+    def import_frame(self, frame, result, first_line=1, checkpoint=None):
+        """
+        Valida e grava um bloco de livros lido como DataFrame (CSV ou formatos
+        colunares), acumulando o resumo em result.
+        
+        Args:
+            frame: DataFrame com as colunas de IMPORT_COLUMNS
+            result: Dicionário de resumo da importação
+            first_line: Número da linha/registro correspondente ao índice 0
+            checkpoint: Checkpoint de importação gravado junto com o lote
+        """
+        rows, errors = self.prepare_frame(frame, first_line, self.validator)
+        
+        for row_num, values, rules in errors:
+            self._register_error(result, row_num, "; ".join(self.validator.messages(rules)), values)
+        
+        self._flush_batch(rows, result, checkpoint)
+    
+    @classmethod
+    def prepare_frame(cls, frame, first_line=1, validator=None):
+        """
+        Normaliza e valida um bloco de livros, sem gravar nada no banco.
+        Pode rodar em outro processo (ver BatchImportService).
+        
+        Args:
+            frame: DataFrame com as colunas de IMPORT_COLUMNS
+            first_line: Número da linha/registro correspondente ao índice 0
+            validator: SchemaValidator que acumula as violações (padrão: um novo)
+        
+        Returns:
+            tuple: (lista de (linha, valores, valores originais) válidos,
+                lista de (linha, valores originais, regras violadas) inválidos)
+        """
+        if validator is None:
+            validator = ValidationService.compile()
+        
+        frame = frame.reindex(columns=cls.IMPORT_COLUMNS, fill_value='')
+        valid_mask, errors, columns = validator.validate_columns(frame)
+        rejected = frame.loc[list(errors)].values.tolist() if errors else []
+        invalid = [
+            (int(index) + first_line, values, rules)
+            for (index, rules), values in zip(errors.items(), rejected)
+        ]
+        
+        if not valid_mask.any():
+            return [], invalid
+        
+        # Valores como vieram do arquivo: se a gravação recusar a linha, é isso que vai
+        # para o arquivo de rejeitados, pronto para ser corrigido e importado de novo
+        rows = zip(
+            frame.index[valid_mask] + first_line,
+            columns['title'][valid_mask].str.upper(),
+            columns['author'][valid_mask].str.upper(),
+            columns['publication_year'][valid_mask].astype(int),
+            columns['price'][valid_mask].astype(float),
+            frame[valid_mask].values.tolist()
+        )
+        return [
+            (int(row_num), {
+                'title': title,
+                'author': author,
+                'publication_year': int(year),
+                'price': float(price)
+            }, raw)
+            for row_num, title, author, year, price, raw in rows
+        ], invalid
+    
+    def _flush_batch(self, batch, result, checkpoint=None):
+        if checkpoint is not None:
+            checkpoint['failed'] = result['failed']
+            if not batch:
+                # Só linhas inválidas desde o último lote: o checkpoint avança sozinho
+                self.db_manager.save_import_checkpoint(checkpoint)
+                return
+        
+        if not batch:
+            return
+        
+        def record_metrics(metrics):
+            metrics['batch'] = len(result['batches']) + 1
+            result['batches'].append(metrics)
+        
+        if checkpoint is not None:
+            checkpoint['batch_id'] += 1
+            checkpoint['imported'] = result['imported'] + len(batch)
+        
+        duplicates = []
+        try:
+            if 'natural_key' in result:
+                counts = self.db_manager.upsert_books(
+                    [values for _, values, _ in batch],
+                    natural_key=result['natural_key'],
+                    batch_size=len(batch),
+                    on_batch=record_metrics,
+                    checkpoint=checkpoint
+                )
+                for name, count in counts.items():
+                    result[name] += count
+            else:
+                self.db_manager.add_books(
+                    [values for _, values, _ in batch],
+                    batch_size=len(batch),
+                    on_batch=record_metrics,
+                    checkpoint=checkpoint,
+                    on_duplicates=duplicates.extend
+                )
+            result['imported'] += len(batch) - len(duplicates)
+        except Exception as e:
+            # O lote inteiro é desfeito, então cada linha dele é reportada como falha
+            self.logger.error(f"Falha ao gravar o lote de {len(batch)} livro(s) (linhas {batch[0][0]} a {batch[-1][0]}): {e}")
+            for row_num, _, raw in batch:
+                result['violations'][self.WRITE_ERROR] += 1
+                self._register_error(result, row_num, self.WRITE_ERROR_MESSAGE, raw, level=logging.ERROR)
+            return
+        
+        if duplicates:
+            duplicate_message = self.DUPLICATE_MESSAGE.format(key=self.db_manager.describe_unique_keys())
+        for position in duplicates:
+            row_num, _, raw = batch[position]
+            result['violations'][self.DUPLICATE] += 1
+            self._register_error(result, row_num, duplicate_message, raw)
+    
+    def _register_error(self, result, row_num, message, values, level=logging.WARNING):
+        result['failed'] += 1
+        self.rejects.add(row_num, values, message)
+        
+        if len(result['errors']) < self.ERROR_SAMPLE_SIZE:
+            error_msg = f"Linha {row_num}: {message}"
+            result['errors'].append(error_msg)
+            self.logger.log(level, error_msg)
+    
+    def close_rejects(self, result):
+        # Fecha o arquivo de rejeitados da importação atual e registra o caminho no resumo
+        if self.rejects is None:
+            return
+        
+        result['rejects_file'] = self.rejects.close()
+        if result['rejects_file']:
+            self.logger.warning(
+                f"{self.rejects.count} linha(s) recusada(s) gravada(s) em {result['rejects_file']}"
+            )
+        self.rejects = None
+    
+    def export_filtered_csv(self, books, filename=None, compress=False, chunk_size=5000, on_progress=None):
+        """
+        Exporta os livros informados, gravando-os no arquivo à medida que são lidos.
+        Aceita uma lista ou um gerador (ex.: DatabaseManager.iter_books).
+        """
         try:
             if filename is None:
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 filename = f"books_filtered_{timestamp}.csv"
             
-            filepath = Path("exports") / filename
+            filepath = self._export_path(filename, compress)
+            total = len(books) if hasattr(books, '__len__') else None
             
-            # Converte lista de livros para dicionários
-            data = [book.to_dict() for book in books]
-            
-            # Cria DataFrame e exporta
-            df = pd.DataFrame(data)
-            df.to_csv(filepath, index=False, encoding='utf-8-sig')
+            iterator = iter(books)
+            batches = iter(lambda: [
+                [book_dict[column] for column in self.EXPORT_COLUMNS]
+                for book_dict in (book.to_dict() for book in islice(iterator, chunk_size))
+            ], [])
+            rows = self._write_csv(filepath, batches, compress, on_progress, total)
             
-            self.logger.info(f"Filtro exportado com sucesso: {filepath}")
+            self.logger.info(f"Filtro exportado com sucesso: {filepath} ({rows} livros)")
             return str(filepath)
             
         except Exception as e:
@@ -1,31 +1,235 @@
-from sqlalchemy import create_engine, or_
+from sqlalchemy import create_engine, event, or_, and_, func, select, update, delete, text, cast, desc, Integer
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from models.book import Base, Book
+from services.migration_service import MigrationService
+from services.cache_service import LRUCache
+from services.wal_archive_service import WalArchiveService
+from services.validation_service import ValidationService, BOOK_SCHEMA
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from functools import wraps
+from itertools import islice
+import atexit
 import logging
+import math
+import re
+import threading
+import time
+import unicodedata
+
+FULLTEXT_SEARCH_SQL = """
+    SELECT books.* FROM books
+    JOIN books_fts ON books_fts.rowid = books.id
+    WHERE books_fts MATCH :query
+    ORDER BY books_fts.rank, books.id
+"""
+
+
+def serialized_write(method):
+    # Escritas passam pelo lock para que o checkpoint do WAL nunca corra junto com elas
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._write_lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
 
 class DatabaseManager:
-    def __init__(self, db_path="data/bookstore.db"):
+    SORTABLE_COLUMNS = {
+        'id': Book.id,
+        'title': Book.title,
+        'author': Book.author,
+        'publication_year': Book.publication_year,
+        'price': Book.price,
+        'created_at': Book.created_at
+    }
+    
+    def __init__(self, db_path="data/bookstore.db", cache_statistics=False,
+                 cache_size=256, cache_ttl=60, wal_archive_dir=None, checkpoint_every=100,
+                 wal_keep_bases=3):
+        """
+        Args:
+            wal_archive_dir: Se informado, ativa o modo WAL e arquiva os segmentos
+                do WAL nesse diretório para recuperação em um ponto no tempo
+            checkpoint_every: Transações confirmadas entre checkpoints do WAL
+            wal_keep_bases: Snapshots base mantidos no arquivo do WAL
+        """
         self.db_path = db_path
+        self.cache_statistics = cache_statistics
+        self._statistics_cache = None
+        self._analytics_cache = {}
+        # Caches de leitura: livros por ID e resultados de buscas recentes
+        self.book_cache = LRUCache(max_size=cache_size, ttl=cache_ttl)
+        self.search_cache = LRUCache(max_size=cache_size, ttl=cache_ttl)
         self.engine = create_engine(f"sqlite:///{db_path}", echo=False)
         self.Session = sessionmaker(bind=self.engine)
         self.logger = logging.getLogger(__name__)
         
+        self._write_lock = threading.RLock()
+        self._unique_keys = set()
+        self.checkpoint_every = checkpoint_every
+        self._writes_since_checkpoint = 0
+        self.wal_archive = None
+        unarchived_changes = False
+        if wal_archive_dir:
+            event.listen(self.engine, "connect", self._configure_wal)
+            self.wal_archive = WalArchiveService(db_path, wal_archive_dir, keep_bases=wal_keep_bases)
+            # Conferido antes de abrir o banco: o banco mudou desde o último checkpoint arquivado?
+            unarchived_changes = self.wal_archive.db_changed()
+            # O SQLite faz o checkpoint e apaga o WAL ao fechar a última conexão;
+            # o que ainda estiver lá precisa ser arquivado antes
+            atexit.register(self.close)
+        
         # Cria as tabelas se não existirem
         Base.metadata.create_all(self.engine)
+        self.schema_version = MigrationService(self.engine).migrate()
+        self.fulltext_enabled = self._has_fulltext()
+        
+        if self.wal_archive:
+            if unarchived_changes:
+                self.wal_archive.mark_gap()
+            if unarchived_changes or not self.wal_archive.has_base():
+                self.checkpoint(new_base=True)
+        
         self.logger.info("Banco de dados inicializado com sucesso")
     
+    @staticmethod
+    def _configure_wal(dbapi_connection, connection_record):
+        # Checkpoints automáticos desligados: só checkpoint() move páginas do WAL
+        # para o banco, depois de arquivar o segmento
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA wal_autocheckpoint=0")
+        cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.close()
+    
+    def checkpoint(self, new_base=False):
+        """
+        Arquiva o WAL atual e faz o checkpoint, truncando o WAL quando possível.
+        
+        Args:
+            new_base: Tira um novo snapshot base após o checkpoint
+            
+        Returns:
+            dict: Segmento arquivado, se o WAL foi truncado e duração,
+                ou None fora do modo WAL
+        """
+        if not self.wal_archive:
+            return None
+        
+        with self._write_lock:
+            started = time.perf_counter()
+            segment = self.wal_archive.archive_segment()
+            
+            with self.engine.connect() as conn:
+                busy, _, _ = conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)").one()
+            
+            # Com leitores ativos o WAL não é truncado; o restante da geração
+            # continua sendo arquivado no próximo checkpoint
+            truncated = busy == 0
+            self.wal_archive.record_db_state()
+            if truncated:
+                self.wal_archive.close_generation()
+                if new_base or not self.wal_archive.has_base():
+                    self.wal_archive.create_base()
+            
+            self._writes_since_checkpoint = 0
+            elapsed = time.perf_counter() - started
+            self.logger.info(
+                f"Checkpoint do WAL em {elapsed:.3f}s "
+                f"({'truncado' if truncated else 'leitores ativos, WAL mantido'})"
+            )
+            return {
+                'segment': segment['file'] if segment else None,
+                'truncated': truncated,
+                'seconds': round(elapsed, 4)
+            }
+    
+    def close(self):
+        """
+        Arquiva o que ainda está no WAL e fecha as conexões. Chamado ao
+        encerrar (também via atexit); pode ser chamado mais de uma vez.
+        """
+        if self.wal_archive:
+            try:
+                self.checkpoint()
+            except (OSError, SQLAlchemyError) as e:
+                self.logger.error(f"Erro no checkpoint do WAL ao encerrar: {e}")
+        self.engine.dispose()
+    
+    def _has_fulltext(self):
+        with self.engine.connect() as conn:
+            return conn.exec_driver_sql(
+                "SELECT 1 FROM sqlite_master WHERE name = 'books_fts'"
+            ).first() is not None
+    
+    @serialized_write
+    def rebuild_search_index(self):
+        if not self.fulltext_enabled:
+            self.logger.warning("Índice de busca indisponível: SQLite sem suporte a FTS5")
+            return False
+        
+        try:
+            with self.engine.begin() as conn:
+                conn.exec_driver_sql("INSERT INTO books_fts(books_fts) VALUES ('rebuild')")
+            self.logger.info("Índice de busca reconstruído")
+            return True
+        except SQLAlchemyError as e:
+            self.logger.error(f"Erro ao reconstruir índice de busca: {e}")
+            return False
+    
+    @contextmanager
+    def offline(self):
+        """
+        Fecha as conexões do pool e bloqueia as escritas enquanto o arquivo do
+        banco é substituído (ex.: restauração de backup). Ao sair, recria o pool,
+        aplica as migrações pendentes e limpa os caches.
+        """
+        with self._write_lock:
+            if self.wal_archive:
+                # Arquiva o que ainda está no WAL antes de o arquivo ser trocado
+                self.checkpoint()
+            self.engine.dispose()
+            try:
+                yield
+            finally:
+                self._reload()
+    
+    def _reload(self):
+        self.engine.dispose()
+        self.schema_version = MigrationService(self.engine).migrate()
+        self.fulltext_enabled = self._has_fulltext()
+        self._statistics_cache = None
+        self._analytics_cache.clear()
+        self.book_cache.clear()
+        self.search_cache.clear()
+        # O novo arquivo pode não ter os índices únicos criados no anterior
+        self._unique_keys.clear()
+        
+        if self.wal_archive:
+            # O histórico anterior não se aplica ao novo arquivo: começa de um novo snapshot base
+            self.checkpoint(new_base=True)
+        self.logger.info("Conexões com o banco de dados recriadas")
+    
     def _get_session(self):
         return self.Session()
     
+    @serialized_write
     def add_book(self, book):
         session = self._get_session()
         try:
             session.add(book)
             session.commit()
+            self._on_write()
             session.refresh(book)
             self.logger.info(f"Livro adicionado: ID={book.id}, Título='{book.title}'")
             return book
+        except IntegrityError:
+            session.rollback()
+            # Violação de um índice único da chave natural (ver ensure_unique_key)
+            raise ValueError(f"Já existe um livro cadastrado com a mesma chave ({self.describe_unique_keys()}).")
         except SQLAlchemyError as e:
             session.rollback()
             self.logger.error(f"Erro ao adicionar livro: {e}")
@@ -33,6 +237,245 @@ class DatabaseManager:
         finally:
             session.close()
     
+    @serialized_write
+    def add_books(self, books, batch_size=1000, on_batch=None, checkpoint=None, on_duplicates=None):
+        """
+        Insere livros em lote, com uma transação por lote.
+        
+        Livros que violam um índice único (criado por ensure_unique_key no modo
+        upsert) são ignorados com ON CONFLICT DO NOTHING em vez de derrubar o lote.
+        
+        Args:
+            books: Iterável de objetos Book ou dicionários com os campos do livro
+            batch_size: Quantidade de livros por transação
+            on_batch: Callback opcional chamado com as métricas de cada lote
+            checkpoint: Checkpoint de importação (ver save_import_checkpoint)
+                gravado na mesma transação do lote, de forma que lote e
+                checkpoint são confirmados juntos
+            on_duplicates: Callback opcional chamado com as posições (a partir de 0,
+                na ordem de books) dos livros ignorados por já existirem
+            
+        Returns:
+            int: Total de livros inseridos
+        """
+        statement = sqlite_insert(Book).on_conflict_do_nothing()
+        iterator = iter(books)
+        total = 0
+        consumed = 0
+        batch_number = 0
+        
+        while True:
+            rows = [self._book_values(book) for book in islice(iterator, batch_size)]
+            if not rows:
+                break
+            
+            batch_number += 1
+            started = time.perf_counter()
+            duplicates = []
+            session = self._get_session()
+            try:
+                inserted = session.connection().execute(statement, rows).rowcount
+                if inserted < len(rows):
+                    # Raro: refaz o lote livro a livro para saber quais já existiam
+                    session.rollback()
+                    conn = session.connection()
+                    duplicates = [
+                        position for position, row in enumerate(rows)
+                        if conn.execute(statement, row).rowcount == 0
+                    ]
+                    if checkpoint is not None:
+                        checkpoint['imported'] -= len(duplicates)
+                        checkpoint['failed'] += len(duplicates)
+                if checkpoint is not None:
+                    self._write_import_checkpoint(session.connection(), checkpoint)
+                session.commit()
+                self._on_write()
+            except SQLAlchemyError as e:
+                session.rollback()
+                self.logger.error(f"Erro ao inserir lote {batch_number}: {e}")
+                raise
+            finally:
+                session.close()
+            
+            elapsed = time.perf_counter() - started
+            total += len(rows) - len(duplicates)
+            if duplicates:
+                self.logger.warning(f"Lote {batch_number}: {len(duplicates)} livro(s) já cadastrado(s) ignorado(s)")
+                if on_duplicates:
+                    on_duplicates([consumed + position for position in duplicates])
+            consumed += len(rows)
+            metrics = {
+                'batch': batch_number,
+                'rows': len(rows),
+                'duplicates': len(duplicates),
+                'seconds': round(elapsed, 4),
+                'rows_per_second': round(len(rows) / elapsed, 1) if elapsed > 0 else None
+            }
+            self.logger.info(
+                f"Lote {batch_number} inserido: {len(rows)} livros em {elapsed:.3f}s "
+                f"({metrics['rows_per_second']} livros/s)"
+            )
+            if on_batch:
+                on_batch(metrics)
+        
+        return total
+    
+    DEFAULT_NATURAL_KEY = ('title', 'author', 'publication_year')
+    
+    @serialized_write
+    def upsert_books(self, books, natural_key=DEFAULT_NATURAL_KEY, batch_size=1000,
+                     on_batch=None, checkpoint=None):
+        """
+        Insere ou atualiza livros em lote pela chave natural, com
+        INSERT ... ON CONFLICT DO UPDATE. Livros já existentes e sem diferença
+        não são reescritos. Nenhuma consulta é feita por livro.
+        
+        Args:
+            books: Iterável de objetos Book ou dicionários com os campos do livro
+            natural_key: Colunas que identificam um livro (ganham um índice único)
+            batch_size, on_batch, checkpoint: Como em add_books
+            
+        Returns:
+            dict: Quantidade de livros inserted, updated e unchanged
+        """
+        natural_key = tuple(natural_key)
+        invalid = set(natural_key) - set(self.UPDATABLE_FIELDS)
+        if invalid or not natural_key:
+            raise ValueError(f"Chave natural inválida: {', '.join(natural_key)}")
+        self.ensure_unique_key(natural_key)
+        
+        updatable = [field for field in self.UPDATABLE_FIELDS if field not in natural_key]
+        statement = sqlite_insert(Book)
+        if updatable:
+            changed = or_(*(Book.__table__.c[field].is_distinct_from(statement.excluded[field]) for field in updatable))
+            # onupdate não é aplicado no ON CONFLICT: updated_at vai em cada linha do
+            # lote, com a hora do Python (microssegundos, como os watermarks)
+            statement = statement.on_conflict_do_update(
+                index_elements=list(natural_key),
+                set_={field: statement.excluded[field] for field in (*updatable, 'updated_at')},
+                where=changed
+            )
+        else:
+            statement = statement.on_conflict_do_nothing(index_elements=list(natural_key))
+        
+        iterator = iter(books)
+        counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        batch_number = 0
+        
+        while True:
+            rows = [self._book_values(book) for book in islice(iterator, batch_size)]
+            if not rows:
+                break
+            
+            batch_number += 1
+            started = time.perf_counter()
+            now = datetime.now()
+            for row in rows:
+                row['updated_at'] = now
+            session = self._get_session()
+            try:
+                # Os IDs novos são sempre maiores que o maior ID antes do lote
+                max_before = session.query(func.coalesce(func.max(Book.id), 0)).scalar()
+                affected = session.connection().execute(statement, rows).rowcount
+                inserted = session.query(func.count(Book.id)).filter(Book.id > max_before).scalar()
+                if checkpoint is not None:
+                    self._write_import_checkpoint(session.connection(), checkpoint)
+                session.commit()
+                self._on_write(all_books=True)
+            except SQLAlchemyError as e:
+                session.rollback()
+                self.logger.error(f"Erro no upsert do lote {batch_number}: {e}")
+                raise
+            finally:
+                session.close()
+            
+            elapsed = time.perf_counter() - started
+            counts['inserted'] += inserted
+            counts['updated'] += affected - inserted
+            counts['unchanged'] += len(rows) - affected
+            metrics = {
+                'batch': batch_number,
+                'rows': len(rows),
+                'inserted': inserted,
+                'updated': affected - inserted,
+                'seconds': round(elapsed, 4),
+                'rows_per_second': round(len(rows) / elapsed, 1) if elapsed > 0 else None
+            }
+            self.logger.info(
+                f"Lote {batch_number} (upsert): {inserted} inseridos, {affected - inserted} atualizados, "
+                f"{len(rows) - affected} sem alteração em {elapsed:.3f}s"
+            )
+            if on_batch:
+                on_batch(metrics)
+        
+        return counts
+    
+    def ensure_unique_key(self, natural_key):
+        # A chave padrão ganha o índice na migração 5; outras chaves, na primeira vez em que são usadas
+        natural_key = tuple(natural_key)
+        if natural_key in self._unique_keys:
+            return
+        if natural_key in self.unique_keys():
+            self._unique_keys.add(natural_key)
+            return
+        
+        index_name = f"ux_books_{'_'.join(natural_key)}"
+        try:
+            with self.engine.begin() as conn:
+                conn.exec_driver_sql(
+                    f"CREATE UNIQUE INDEX IF NOT EXISTS {index_name} ON books ({', '.join(natural_key)})"
+                )
+        except IntegrityError:
+            raise ValueError(
+                f"Já existem livros repetidos para a chave ({self.describe_key(natural_key)}); "
+                "remova as duplicatas antes de importar com atualização."
+            )
+        self._unique_keys.add(natural_key)
+    
+    def unique_keys(self):
+        """
+        Chaves com índice único na tabela books, lidas do próprio banco.
+        
+        Returns:
+            list: Tuplas com as colunas de cada índice único
+        """
+        keys = []
+        with self.engine.connect() as conn:
+            for _, name, unique, origin, _ in conn.exec_driver_sql("PRAGMA index_list(books)").all():
+                if unique and origin == "c":
+                    columns = conn.exec_driver_sql(f"PRAGMA index_info({name})").all()
+                    keys.append(tuple(column for _, _, column in sorted(columns)))
+        return keys
+    
+    KEY_LABELS = {'title': 'título', 'author': 'autor', 'publication_year': 'ano', 'price': 'preço'}
+    
+    @classmethod
+    def describe_key(cls, natural_key=None):
+        # Ex.: ('title', 'author', 'publication_year') -> "título, autor e ano"
+        labels = [cls.KEY_LABELS.get(column, column) for column in natural_key or cls.DEFAULT_NATURAL_KEY]
+        if len(labels) == 1:
+            return labels[0]
+        return f"{', '.join(labels[:-1])} e {labels[-1]}"
+    
+    def describe_unique_keys(self):
+        # Chaves que podem recusar uma inserção, para as mensagens de livro duplicado
+        keys = self.unique_keys() or [self.DEFAULT_NATURAL_KEY]
+        return " ou ".join(self.describe_key(key) for key in keys)
+    
+    @staticmethod
+    def _book_values(book):
+        if isinstance(book, Book):
+            values = {
+                'title': book.title,
+                'author': book.author,
+                'publication_year': book.publication_year,
+                'price': book.price
+            }
+            if book.created_at is not None:
+                values['created_at'] = book.created_at
+            return values
+        return dict(book)
+    
     def get_all_books(self):
         session = self._get_session()
         try:
@@ -45,11 +488,258 @@ class DatabaseManager:
         finally:
             session.close()
     
+    def iter_books(self, page_size=1000, after_id=None, order_by="id", after_value=None):
+        """
+        Percorre o catálogo em páginas usando paginação por chave (keyset),
+        mantendo em memória apenas uma página por vez.
+        
+        Args:
+            page_size: Quantidade de livros lidos por consulta
+            after_id: ID do último livro já processado (a leitura começa depois dele)
+            order_by: Coluna de ordenação (ver SORTABLE_COLUMNS)
+            after_value: Valor de ordenação do último livro já processado
+                (necessário se ele puder ter sido removido)
+            
+        Yields:
+            Book: Livros na ordem solicitada
+        """
+        session = self._get_session()
+        try:
+            cursor = self._resolve_cursor(session, after_id, order_by, after_value)
+            
+            while True:
+                query = self._keyset_query(session, cursor, order_by).limit(page_size)
+                
+                last_book = None
+                count = 0
+                for book in query.yield_per(page_size):
+                    last_book = book
+                    count += 1
+                    yield book
+                
+                if count < page_size:
+                    break
+                
+                cursor = (getattr(last_book, order_by), last_book.id)
+                # Libera a página anterior da sessão para manter a memória estável
+                session.expunge_all()
+        except SQLAlchemyError as e:
+            self.logger.error(f"Erro ao percorrer livros: {e}")
+        finally:
+            session.close()
+    
+    def iter_row_chunks(self, columns, chunk_size=5000):
+        """
+        Lê colunas da tabela books em blocos de tuplas, em ordem de ID, usando
+        um cursor em streaming. Mais leve que iter_books para exportações,
+        pois não cria objetos Book.
+        
+        Args:
+            columns: Nomes das colunas
+            chunk_size: Linhas por bloco
+            
+        Yields:
+            list: Bloco de tuplas com os valores das colunas
+        """
+        table = Book.__table__
+        with self.engine.connect() as conn:
+            result = conn.execution_options(yield_per=chunk_size).execute(
+                select(*(table.c[column] for column in columns)).order_by(table.c.id)
+            )
+            for rows in result.partitions():
+                yield rows
+    
+    def count_books(self):
+        with self.engine.connect() as conn:
+            return conn.execute(select(func.count()).select_from(Book.__table__)).scalar()
+    
+    CHANGE_COLUMNS = ('id', 'title', 'author', 'publication_year', 'price', 'created_at', 'updated_at')
+    
+    def change_high_watermark(self):
+        """
+        Instante até o qual todas as alterações já estão confirmadas.
+        Tomado sob o lock de escrita: nenhuma escrita em andamento tem data anterior.
+        
+        O trigger de tombstones só tem milissegundos (grava ...ms000), então o limite
+        é o fim do último milissegundo completo: uma exclusão ainda no milissegundo
+        atual fica maior que ele e sai na próxima exportação, em vez de ser perdida.
+        """
+        with self._write_lock:
+            now = datetime.now()
+        return now.replace(microsecond=now.microsecond // 1000 * 1000) - timedelta(microseconds=1)
+    
+    def iter_changes(self, since, until, chunk_size=5000):
+        """
+        Percorre as alterações no intervalo (since, until]: primeiro as exclusões
+        (tombstones), depois os livros inseridos ou alterados. Aplicar nessa
+        ordem reproduz o estado final mesmo quando um ID é reaproveitado.
+        
+        Args:
+            since: Watermark anterior (None percorre o catálogo inteiro, sem exclusões)
+            until: Limite superior (ver change_high_watermark)
+            chunk_size: Linhas por bloco
+            
+        Yields:
+            list: Bloco de tuplas (op, id, title, author, publication_year,
+                price, created_at, updated_at), com op igual a "delete" ou "upsert"
+        """
+        table = Book.__table__
+        with self.engine.connect() as conn:
+            if since is not None:
+                result = conn.execution_options(yield_per=chunk_size).exec_driver_sql(
+                    "SELECT book_id, deleted_at FROM book_tombstones "
+                    "WHERE deleted_at > ? AND deleted_at <= ? ORDER BY deleted_at",
+                    (self._timestamp(since), self._timestamp(until))
+                )
+                for rows in result.partitions():
+                    yield [("delete", book_id, None, None, None, None, None, deleted_at) for book_id, deleted_at in rows]
+            
+            conditions = [table.c.updated_at <= until]
+            if since is not None:
+                conditions.append(table.c.updated_at > since)
+            result = conn.execution_options(yield_per=chunk_size).execute(
+                select(*(table.c[column] for column in self.CHANGE_COLUMNS))
+                .where(*conditions)
+                .order_by(table.c.updated_at, table.c.id)
+            )
+            for rows in result.partitions():
+                yield [("upsert", *row) for row in rows]
+    
+    @staticmethod
+    def _timestamp(value):
+        # Formato usado pelo SQLAlchemy para DateTime no SQLite
+        return value.strftime("%Y-%m-%d %H:%M:%S.%f")
+    
+    def get_watermark(self, feed):
+        with self.engine.connect() as conn:
+            value = conn.exec_driver_sql(
+                "SELECT watermark FROM export_watermarks WHERE feed = ?", (feed,)
+            ).scalar()
+        return datetime.strptime(value, "%Y-%m-%d %H:%M:%S.%f") if value else None
+    
+    @serialized_write
+    def set_watermark(self, feed, watermark):
+        """
+        Avança o watermark de uma exportação e descarta os tombstones que
+        todas as exportações já entregaram.
+        """
+        with self.engine.begin() as conn:
+            conn.exec_driver_sql(
+                "INSERT INTO export_watermarks (feed, watermark, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(feed) DO UPDATE SET watermark = excluded.watermark, updated_at = excluded.updated_at",
+                (feed, self._timestamp(watermark), self._timestamp(datetime.now()))
+            )
+            conn.exec_driver_sql(
+                "DELETE FROM book_tombstones WHERE deleted_at <= (SELECT MIN(watermark) FROM export_watermarks)"
+            )
+        self.logger.info(f"Watermark da exportação '{feed}' avançado para {watermark}")
+    
+    IMPORT_CHECKPOINT_FIELDS = (
+        'fingerprint', 'filename', 'status', 'byte_offset', 'line', 'batch_id', 'imported', 'failed'
+    )
+    
+    def get_import_checkpoint(self, fingerprint):
+        with self.engine.connect() as conn:
+            row = conn.exec_driver_sql(
+                f"SELECT {', '.join(self.IMPORT_CHECKPOINT_FIELDS)} FROM import_checkpoints WHERE fingerprint = ?",
+                (fingerprint,)
+            ).first()
+        return dict(zip(self.IMPORT_CHECKPOINT_FIELDS, row)) if row else None
+    
+    @serialized_write
+    def save_import_checkpoint(self, checkpoint):
+        with self.engine.begin() as conn:
+            self._write_import_checkpoint(conn, checkpoint)
+    
+    def _write_import_checkpoint(self, conn, checkpoint):
+        values = [checkpoint[field] for field in self.IMPORT_CHECKPOINT_FIELDS]
+        conn.exec_driver_sql(
+            f"INSERT OR REPLACE INTO import_checkpoints ({', '.join(self.IMPORT_CHECKPOINT_FIELDS)}, updated_at) "
+            f"VALUES ({', '.join('?' * len(values))}, ?)",
+            (*values, self._timestamp(datetime.now()))
+        )
+    
+    def get_page(self, page_size=20, after_id=None, order_by="id", after_value=None):
+        """
+        Retorna uma página do catálogo para exibição.
+        
+        Args:
+            after_id, after_value: Cursor da página anterior (next_after_id e
+                next_after_value). Com o valor de ordenação no cursor, a paginação
+                continua mesmo que o último livro exibido tenha sido removido.
+        
+        Returns:
+            dict: books, next_after_id e next_after_value (para pedir a próxima
+                página) e has_more
+        """
+        session = self._get_session()
+        try:
+            cursor = self._resolve_cursor(session, after_id, order_by, after_value)
+            books = self._keyset_query(session, cursor, order_by).limit(page_size + 1).all()
+            has_more = len(books) > page_size
+            books = books[:page_size]
+            last_book = books[-1] if books and has_more else None
+            
+            return {
+                'books': books,
+                'next_after_id': last_book.id if last_book else None,
+                'next_after_value': getattr(last_book, order_by) if last_book else None,
+                'has_more': has_more
+            }
+        except SQLAlchemyError as e:
+            self.logger.error(f"Erro ao buscar página de livros: {e}")
+            return {'books': [], 'next_after_id': None, 'next_after_value': None, 'has_more': False}
+        finally:
+            session.close()
+    
+    def _resolve_cursor(self, session, after_id, order_by, after_value=None):
+        if order_by not in self.SORTABLE_COLUMNS:
+            raise ValueError(f"Ordenação inválida: {order_by}")
+        
+        if after_id is None:
+            return None
+        if order_by == "id":
+            return (after_id, after_id)
+        if after_value is not None:
+            return (after_value, after_id)
+        
+        value = session.query(self.SORTABLE_COLUMNS[order_by]).filter(Book.id == after_id).scalar()
+        if value is None:
+            # Sem o valor de ordenação não há como saber onde a página anterior parou
+            raise ValueError(
+                f"O livro ID={after_id} do cursor não existe mais; "
+                "informe também after_value para continuar a paginação."
+            )
+        return (value, after_id)
+    
+    def _keyset_query(self, session, cursor, order_by):
+        column = self.SORTABLE_COLUMNS[order_by]
+        query = session.query(Book)
+        
+        if cursor is not None:
+            value, last_id = cursor
+            if order_by == "id":
+                query = query.filter(Book.id > last_id)
+            else:
+                query = query.filter(or_(
+                    column > value,
+                    and_(column == value, Book.id > last_id)
+                ))
+        
+        if order_by == "id":
+            return query.order_by(Book.id)
+        return query.order_by(column, Book.id)
+    
     def get_book_by_id(self, book_id):
+        book = self.book_cache.get(book_id)
+        if book is not None:
+            return book
+        
         session = self._get_session()
         try:
             book = session.query(Book).filter_by(id=book_id).first()
             if book:
+                self.book_cache.set(book_id, book)
                 self.logger.info(f"Livro encontrado: ID={book_id}")
             else:
                 self.logger.warning(f"Livro não encontrado: ID={book_id}")
@@ -60,6 +750,7 @@ class DatabaseManager:
         finally:
             session.close()
     
+    @serialized_write
     def update_book(self, book_id, **kwargs):
         session = self._get_session()
         try:
@@ -80,6 +771,10 @@ class DatabaseManager:
                 book.price = kwargs["price"]
             
             session.commit()
+            self._on_write(
+                book_ids=[book_id],
+                matches_changed="title" in kwargs or "author" in kwargs
+            )
             self.logger.info(f"Livro atualizado: ID={book_id}")
             return True
         except SQLAlchemyError as e:
@@ -89,6 +784,7 @@ class DatabaseManager:
         finally:
             session.close()
     
+    @serialized_write
     def delete_book(self, book_id):
         session = self._get_session()
         try:
@@ -100,6 +796,7 @@ class DatabaseManager:
             
             session.delete(book)
             session.commit()
+            self._on_write(book_ids=[book_id], matches_changed=False)
             self.logger.info(f"Livro removido: ID={book_id}")
             return True
         except SQLAlchemyError as e:
@@ -109,31 +806,223 @@ class DatabaseManager:
         finally:
             session.close()
     
-    def search_books_by_author(self, author):
+    UPDATABLE_FIELDS = ('title', 'author', 'publication_year', 'price')
+    
+    def update_books(self, filters, **changes):
+        """
+        Atualiza em uma única instrução SQL todos os livros que atendem ao filtro.
+        Os novos valores passam pelas mesmas regras de BOOK_SCHEMA do cadastro.
+        
+        Args:
+            filters: Dicionário de filtros (ver _build_conditions)
+            **changes: Campos e novos valores
+            
+        Returns:
+            int: Quantidade de livros alterados
+        """
+        invalid = set(changes) - set(self.UPDATABLE_FIELDS)
+        if invalid:
+            raise ValueError(f"Campos inválidos para atualização: {', '.join(sorted(invalid))}")
+        if not changes:
+            raise ValueError("Nenhum campo foi especificado para atualização.")
+        
+        validator = ValidationService.compile()
+        checks = [validator.check_field(field, value) for field, value in changes.items()]
+        errors = [error for valid, error in checks if not valid]
+        if errors:
+            raise ValueError(" ".join(errors))
+        
+        count = self._execute_bulk(
+            update(Book).where(*self._build_conditions(filters)).values(**changes)
+        )
+        self.logger.info(f"Atualização em lote: {count} livros alterados ({', '.join(changes)})")
+        return count
+    
+    def reprice(self, filters, percent=None, absolute=None):
+        """
+        Reajusta o preço dos livros filtrados em uma única instrução SQL.
+        O preço resultante fica dentro dos limites de BOOK_SCHEMA (nunca negativo).
+        
+        Args:
+            filters: Dicionário de filtros (ver _build_conditions)
+            percent: Reajuste percentual (ex.: 10 para +10%, -15 para -15%)
+            absolute: Valor somado ao preço atual (ex.: -5.0)
+            
+        Returns:
+            int: Quantidade de livros reajustados
+        """
+        if (percent is None) == (absolute is None):
+            raise ValueError("Informe apenas um tipo de reajuste: percentual ou absoluto.")
+        
+        amount = percent if percent is not None else absolute
+        if isinstance(amount, bool) or not isinstance(amount, (int, float)) or not math.isfinite(amount):
+            raise ValueError("O reajuste deve ser um número válido.")
+        
+        if percent is not None:
+            new_price = func.round(Book.price * (1 + percent / 100.0), 2)
+        else:
+            new_price = func.round(Book.price + absolute, 2)
+        
+        price_rules = BOOK_SCHEMA['price']
+        if 'min' in price_rules:
+            new_price = func.max(new_price, price_rules['min'])
+        if 'max' in price_rules:
+            new_price = func.min(new_price, price_rules['max'])
+        
+        count = self._execute_bulk(
+            update(Book).where(*self._build_conditions(filters)).values(price=new_price)
+        )
+        self.logger.info(f"Reajuste de preços: {count} livros reajustados")
+        return count
+    
+    def delete_books(self, ids=None, filters=None):
+        """
+        Remove em uma única instrução SQL os livros com os IDs informados
+        ou que atendem ao filtro.
+        
+        Returns:
+            int: Quantidade de livros removidos
+        """
+        filters = dict(filters or {})
+        if ids is not None:
+            filters['ids'] = ids
+        
+        count = self._execute_bulk(
+            delete(Book).where(*self._build_conditions(filters))
+        )
+        self.logger.info(f"Remoção em lote: {count} livros removidos")
+        return count
+    
+    def _build_conditions(self, filters):
+        """
+        Converte o dicionário de filtros em condições SQL.
+        
+        Filtros aceitos: ids, title, author, publication_year,
+        year_from, year_to, price_min e price_max.
+        """
+        if not filters:
+            # Evita alterar o catálogo inteiro por engano
+            raise ValueError("Informe ao menos um filtro para a operação em lote.")
+        
+        builders = {
+            'ids': lambda value: Book.id.in_(list(value)),
+            'title': lambda value: Book.title == value,
+            'author': lambda value: Book.author == value,
+            'publication_year': lambda value: Book.publication_year == value,
+            'year_from': lambda value: Book.publication_year >= value,
+            'year_to': lambda value: Book.publication_year <= value,
+            'price_min': lambda value: Book.price >= value,
+            'price_max': lambda value: Book.price <= value
+        }
+        
+        invalid = set(filters) - set(builders)
+        if invalid:
+            raise ValueError(f"Filtros inválidos: {', '.join(sorted(invalid))}")
+        
+        return [builders[name](value) for name, value in filters.items()]
+    
+    @serialized_write
+    def _execute_bulk(self, statement):
         session = self._get_session()
         try:
-            books = session.query(Book).filter(
-                Book.author.ilike(f"%{author}%")
-            ).all()
-            self.logger.info(f"Encontrados {len(books)} livros do autor '{author}'")
-            return books
+            result = session.execute(statement.execution_options(synchronize_session=False))
+            session.commit()
+            self._on_write(all_books=True)
+            return result.rowcount
         except SQLAlchemyError as e:
-            self.logger.error(f"Erro ao buscar livros por autor: {e}")
-            return []
+            session.rollback()
+            self.logger.error(f"Erro na operação em lote: {e}")
+            raise
         finally:
             session.close()
     
+    def search_books_by_author(self, author):
+        books = self._search(author, column="author")
+        self.logger.info(f"Encontrados {len(books)} livros do autor '{author}'")
+        return books
+    
     def search_books(self, query):
+        books = self._search(query)
+        self.logger.info(f"Busca por '{query}' retornou {len(books)} resultados")
+        return books
+    
+    @staticmethod
+    def _fulltext_query(query, column=None):
+        # Cada termo vira uma busca por prefixo; todos os termos precisam aparecer
+        terms = re.findall(r"\w+", query or "")
+        if not terms:
+            return None
+        expression = " ".join(f'"{term}"*' for term in terms)
+        return f"{column} : ({expression})" if column else expression
+    
+    @staticmethod
+    def _index_term(term):
+        # Mesmo tratamento do tokenizador unicode61 remove_diacritics: minúsculas, sem acentos
+        decomposed = unicodedata.normalize("NFKD", term.lower())
+        return "".join(char for char in decomposed if not unicodedata.combining(char))
+    
+    def _whole_terms(self, query, column=None):
+        """
+        Indica se cada termo da busca é uma palavra inteira do índice FTS5.
+        Um pedaço de palavra (ex.: "GU" de "VOGUE") só é encontrado no meio
+        das palavras pelo LIKE, como antes do índice.
+        """
+        sql = "SELECT 1 FROM books_fts_vocab WHERE term = ?"
+        if column:
+            sql += " AND col = ?"
+        with self.engine.connect() as conn:
+            for term in re.findall(r"\w+", query or ""):
+                params = (self._index_term(term), column) if column else (self._index_term(term),)
+                if conn.exec_driver_sql(sql, params).first() is None:
+                    return False
+        return True
+    
+    def _search(self, query, column=None):
+        """
+        Busca no título e no autor (ou só na coluna informada).
+        
+        Com o índice FTS5, termos que são palavras inteiras do catálogo encontram
+        os livros com palavras que começam por eles, sem acento e em qualquer
+        ordem; uma palavra que só aparece dentro de outra (ex.: "VOGU" em "RIVOGUE")
+        não entra. Se algum termo não for uma palavra inteira, a busca usa LIKE
+        (trecho em qualquer posição), como antes do índice.
+        """
+        cache_key = (column, query)
+        cached = self.search_cache.get(cache_key)
+        if cached is not None:
+            return list(cached)
+        
+        match = self._fulltext_query(query, column) if self.fulltext_enabled else None
+        if match is not None and not self._whole_terms(query, column):
+            match = None
+        if match is None:
+            books = self._search_like(query, column)
+        else:
+            session = self._get_session()
+            try:
+                books = session.query(Book).from_statement(
+                    text(FULLTEXT_SEARCH_SQL)
+                ).params(query=match).all()
+            except SQLAlchemyError as e:
+                self.logger.error(f"Erro na busca: {e}")
+                return []
+            finally:
+                session.close()
+        
+        self.search_cache.set(cache_key, tuple(books))
+        return books
+    
+    def _search_like(self, query, column=None):
         session = self._get_session()
         try:
-            books = session.query(Book).filter(
-                or_(
+            if column == "author":
+                condition = Book.author.ilike(f"%{query}%")
+            else:
+                condition = or_(
                     Book.title.ilike(f"%{query}%"),
                     Book.author.ilike(f"%{query}%")
                 )
-            ).all()
-            self.logger.info(f"Busca por '{query}' retornou {len(books)} resultados")
-            return books
+            return session.query(Book).filter(condition).all()
         except SQLAlchemyError as e:
             self.logger.error(f"Erro na busca: {e}")
             return []
@@ -141,21 +1030,162 @@ class DatabaseManager:
             session.close()
     
     def get_statistics(self):
+        if self.cache_statistics and self._statistics_cache is not None:
+            return dict(self._statistics_cache)
+        
         session = self._get_session()
         try:
-            from sqlalchemy import func
+            # Todos os agregados em uma única consulta
+            total_books, total_authors, average_price, most_expensive, cheapest = session.query(
+                func.count(Book.id),
+                func.count(func.distinct(Book.author)),
+                func.avg(Book.price),
+                func.max(Book.price),
+                func.min(Book.price)
+            ).one()
             
             stats = {
-                'total_books': session.query(func.count(Book.id)).scalar(),
-                'total_authors': session.query(func.count(func.distinct(Book.author))).scalar(),
-                'average_price': session.query(func.avg(Book.price)).scalar() or 0,
-                'most_expensive': session.query(func.max(Book.price)).scalar() or 0,
-                'cheapest': session.query(func.min(Book.price)).scalar() or 0
+                'total_books': total_books,
+                'total_authors': total_authors,
+                'average_price': average_price or 0,
+                'most_expensive': most_expensive or 0,
+                'cheapest': cheapest or 0
             }
             
+            if self.cache_statistics:
+                self._statistics_cache = dict(stats)
+            
             return stats
         except SQLAlchemyError as e:
             self.logger.error(f"Erro ao calcular estatísticas: {e}")
             return {}
         finally:
             session.close()
+    
+    def _run_analytics(self, key, query):
+        """
+        Executa uma agregação no banco. Com cache_statistics, o resultado fica
+        em cache até a próxima escrita, como em get_statistics.
+        """
+        if self.cache_statistics and key in self._analytics_cache:
+            return list(self._analytics_cache[key])
+        
+        session = self._get_session()
+        try:
+            rows = [tuple(row) for row in query(session)]
+            
+            if self.cache_statistics:
+                self._analytics_cache[key] = rows
+            
+            return list(rows)
+        except SQLAlchemyError as e:
+            self.logger.error(f"Erro ao calcular {key[0]}: {e}")
+            return []
+        finally:
+            session.close()
+    
+    def top_authors(self, k=5):
+        """
+        Autores com mais livros, agrupados no banco (GROUP BY ... LIMIT k).
+        
+        Returns:
+            list: (autor, quantidade) do maior para o menor
+        """
+        books = func.count(Book.id).label('books')
+        return self._run_analytics(
+            ('top_authors', k),
+            lambda session: session.query(Book.author, books)
+                .group_by(Book.author)
+                .order_by(desc(books), Book.author)
+                .limit(k)
+        )
+    
+    def year_histogram(self, bucket_size=1):
+        """
+        Quantidade de livros por ano de publicação.
+        
+        Args:
+            bucket_size: Anos por faixa (ex.: 10 agrupa por década)
+            
+        Returns:
+            list: (primeiro ano da faixa, quantidade) em ordem crescente
+        """
+        if bucket_size == 1:
+            bucket = Book.publication_year
+        else:
+            # Arredonda para baixo também os anos negativos (o % do SQLite mantém o sinal)
+            bucket = Book.publication_year - (Book.publication_year % bucket_size + bucket_size) % bucket_size
+        bucket = bucket.label('bucket')
+        
+        return self._run_analytics(
+            ('year_histogram', bucket_size),
+            lambda session: session.query(bucket, func.count(Book.id))
+                .group_by(bucket)
+                .order_by(bucket)
+        )
+    
+    def price_buckets(self, bucket_size=10):
+        """
+        Quantidade de livros por faixa de preço.
+        
+        Args:
+            bucket_size: Largura de cada faixa em reais
+            
+        Returns:
+            list: (preço inicial, preço final, quantidade) das faixas com livros, em ordem crescente
+        """
+        # Os preços nunca são negativos, então o CAST (que trunca) equivale a arredondar para baixo
+        bucket = cast(Book.price / bucket_size, Integer).label('bucket')
+        
+        rows = self._run_analytics(
+            ('price_buckets', bucket_size),
+            lambda session: session.query(bucket, func.count(Book.id))
+                .group_by(bucket)
+                .order_by(bucket)
+        )
+        return [(index * bucket_size, (index + 1) * bucket_size, count) for index, count in rows]
+    
+    def get_cache_stats(self):
+        return {
+            'books': self.book_cache.get_stats(),
+            'searches': self.search_cache.get_stats()
+        }
+    
+    def _on_write(self, book_ids=None, matches_changed=True, all_books=False):
+        """
+        Invalida os caches após uma escrita confirmada no banco.
+        
+        Args:
+            book_ids: IDs dos livros alterados ou removidos
+            matches_changed: Se a escrita pode mudar quais livros uma busca encontra
+                (inserção ou alteração de título/autor)
+            all_books: Se a escrita pode ter afetado livros de IDs desconhecidos
+                (operações em lote)
+        """
+        self._statistics_cache = None
+        self._analytics_cache.clear()
+        
+        if self.wal_archive:
+            self._writes_since_checkpoint += 1
+            if self._writes_since_checkpoint >= self.checkpoint_every:
+                try:
+                    self.checkpoint()
+                except (OSError, SQLAlchemyError) as e:
+                    # A escrita já foi confirmada; o segmento fica para o próximo checkpoint
+                    self.logger.error(f"Erro no checkpoint do WAL: {e}")
+        
+        if all_books:
+            self.book_cache.clear()
+            self.search_cache.clear()
+            return
+        
+        ids = set(book_ids or [])
+        for book_id in ids:
+            self.book_cache.invalidate(book_id)
+        
+        if matches_changed:
+            self.search_cache.clear()
+        elif ids:
+            self.search_cache.invalidate_where(
+                lambda key, books: any(book.id in ids for book in books)
+            )
@@ -0,0 +1,210 @@
+from pathlib import Path
+from datetime import datetime
+from itertools import islice
+import json
+import logging
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow é opcional: sem ele apenas JSON Lines fica disponível
+    pa = None
+    pq = None
+
+
+class ExportService:
+    """
+    Exportação e importação do catálogo em formatos colunares (Parquet e
+    Arrow IPC/Feather) e em JSON Lines, sempre em blocos.
+
+    Os arquivos Parquet e Arrow levam o schema com os tipos de cada coluna,
+    para que quem os lê não precise inferir tipos. Parquet e Arrow exigem
+    o pacote opcional pyarrow.
+    """
+
+    FORMATS = {
+        'parquet': '.parquet',
+        'arrow': '.arrow',
+        'jsonl': '.jsonl'
+    }
+    FORMATS_BY_SUFFIX = {'.parquet': 'parquet', '.arrow': 'arrow', '.feather': 'arrow', '.jsonl': 'jsonl'}
+
+    def __init__(self, database_manager, csv_service):
+        self.db_manager = database_manager
+        # As importações reaproveitam a validação e a gravação em lote do CSVService
+        self.csv_service = csv_service
+        self.columns = csv_service.EXPORT_COLUMNS
+        self.logger = logging.getLogger(__name__)
+
+    @staticmethod
+    def arrow_schema():
+        return pa.schema([
+            ('id', pa.int64()),
+            ('title', pa.string()),
+            ('author', pa.string()),
+            ('publication_year', pa.int32()),
+            ('price', pa.float64()),
+            ('created_at', pa.timestamp('us'))
+        ])
+
+    def _require_pyarrow(self, file_format):
+        if pa is None:
+            raise RuntimeError(f"O formato {file_format} requer o pacote pyarrow (pip install pyarrow)")
+
+    def export(self, file_format, filename=None, chunk_size=100000, compression="zstd", on_progress=None):
+        """
+        Exporta o catálogo no formato informado, lendo o banco em blocos.
+
+        Args:
+            file_format: "parquet", "arrow" ou "jsonl"
+            filename: Nome do arquivo (padrão: books_export_<data>.<extensão>)
+            chunk_size: Linhas por bloco; no Parquet, também o tamanho de cada row group
+            compression: Compressão do Parquet/Arrow ("zstd", "lz4", "snappy" ou None)
+            on_progress: Callback opcional chamado a cada bloco com
+                {'rows': linhas gravadas, 'total': total de linhas}
+
+        Returns:
+            str: Caminho do arquivo gerado ou None em caso de erro
+        """
+        if file_format not in self.FORMATS:
+            raise ValueError(f"Formato de exportação inválido: {file_format}")
+
+        try:
+            if filename is None:
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                filename = f"books_export_{timestamp}{self.FORMATS[file_format]}"
+
+            filepath = Path("exports") / filename
+            total = self.db_manager.count_books()
+            batches = self.db_manager.iter_row_chunks(self.columns, chunk_size)
+
+            if file_format == "jsonl":
+                writer = self._write_jsonl
+            else:
+                self._require_pyarrow(file_format)
+                writer = self._write_parquet if file_format == "parquet" else self._write_arrow
+
+            written = 0
+            for rows in writer(filepath, batches, compression):
+                written += rows
+                if on_progress:
+                    on_progress({'rows': written, 'total': total})
+
+            self.logger.info(f"Dados exportados com sucesso: {filepath} ({written} livros)")
+            return str(filepath)
+
+        except Exception as e:
+            self.logger.error(f"Erro ao exportar {file_format}: {e}")
+            return None
+
+    def _record_batch(self, rows):
+        schema = self.arrow_schema()
+        columns = list(zip(*rows))
+        return pa.record_batch(
+            [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+            schema=schema
+        )
+
+    def _write_parquet(self, filepath, batches, compression):
+        # Cada bloco lido do banco vira um row group
+        with pq.ParquetWriter(filepath, self.arrow_schema(), compression=compression) as writer:
+            for rows in batches:
+                writer.write_batch(self._record_batch(rows))
+                yield len(rows)
+
+    def _write_arrow(self, filepath, batches, compression):
+        # Arquivo Arrow IPC, o mesmo formato do Feather v2
+        options = pa.ipc.IpcWriteOptions(compression=compression)
+        with pa.ipc.new_file(filepath, self.arrow_schema(), options=options) as writer:
+            for rows in batches:
+                writer.write_batch(self._record_batch(rows))
+                yield len(rows)
+
+    def _write_jsonl(self, filepath, batches, compression=None):
+        with open(filepath, 'w', encoding='utf-8') as file:
+            for rows in batches:
+                for row in rows:
+                    record = dict(zip(self.columns, row))
+                    if record['created_at'] is not None:
+                        record['created_at'] = record['created_at'].isoformat()
+                    file.write(json.dumps(record, ensure_ascii=False))
+                    file.write("\n")
+                yield len(rows)
+
+    def import_file(self, filename, chunk_size=50000, upsert=False, natural_key=None):
+        """
+        Importa livros de um arquivo Parquet, Arrow/Feather ou JSON Lines da
+        pasta imports, validando e gravando bloco a bloco pelo caminho de
+        inserção em lote. IDs e datas de cadastro do arquivo não são reaproveitados.
+        upsert e natural_key funcionam como em CSVService.import_from_csv.
+
+        Returns:
+            dict: Resumo da importação, no mesmo formato de CSVService.import_from_csv
+        """
+        filepath = Path("imports") / filename
+        result = self.csv_service.new_import_result(upsert, natural_key, source=filename)
+
+        file_format = self.FORMATS_BY_SUFFIX.get(filepath.suffix.lower())
+        if file_format is None:
+            result.update(success=False, message=f"Formato de arquivo não suportado: {filepath.suffix}")
+            return result
+
+        if not filepath.exists():
+            self.logger.error(f"Arquivo não encontrado: {filepath}")
+            result.update(success=False, message='Arquivo não encontrado')
+            return result
+
+        try:
+            if upsert:
+                self.db_manager.ensure_unique_key(result['natural_key'])
+            
+            if file_format == "jsonl":
+                frames = self._read_jsonl(filepath, chunk_size)
+            else:
+                self._require_pyarrow(file_format)
+                frames = self._read_columnar(filepath, file_format, chunk_size)
+
+            # Numera os registros a partir de 1, continuando entre os blocos
+            first_record = 1
+            for frame in frames:
+                self.csv_service.import_frame(frame, result, first_line=first_record)
+                first_record += len(frame)
+
+            result['success'] = True
+            return result
+
+        except Exception as e:
+            self.logger.error(f"Erro ao importar {filepath.name}: {e}")
+            result['success'] = False
+            result['message'] = str(e)
+            return result
+        finally:
+            self.csv_service.close_rejects(result)
+
+    def _read_columnar(self, filepath, file_format, chunk_size):
+        columns = self.csv_service.IMPORT_COLUMNS
+
+        if file_format == "parquet":
+            batches = pq.ParquetFile(filepath).iter_batches(batch_size=chunk_size, columns=columns)
+        else:
+            reader = pa.ipc.open_file(pa.memory_map(str(filepath)))
+            batches = (reader.get_batch(i).select(columns) for i in range(reader.num_record_batches))
+
+        for batch in batches:
+            # integer_object_nulls mantém os anos como inteiros mesmo com valores nulos
+            yield batch.to_pandas(integer_object_nulls=True)
+
+    def _read_jsonl(self, filepath, chunk_size):
+        with open(filepath, 'r', encoding='utf-8') as file:
+            lines = (line for line in file if line.strip())
+            while True:
+                records = [json.loads(line) for line in islice(lines, chunk_size)]
+                if not records:
+                    break
+                # dtype object evita que um valor nulo transforme a coluna de anos em float
+                yield pd.DataFrame(
+                    {column: [record.get(column) for record in records] for column in self.csv_service.IMPORT_COLUMNS},
+                    dtype=object
+                )
@@ -0,0 +1,198 @@
+from sqlalchemy.exc import OperationalError, IntegrityError
+from datetime import datetime
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _create_fulltext_index(conn):
+    # Índice de texto completo (FTS5) sincronizado com a tabela books por triggers.
+    # remove_diacritics permite que "ANEIS" encontre "ANÉIS".
+    exists = conn.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE name = 'books_fts'"
+    ).first()
+
+    try:
+        conn.exec_driver_sql("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5(
+                title, author,
+                content='books', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+        """)
+    except OperationalError as e:
+        logger.warning(f"FTS5 indisponível, buscas usarão LIKE: {e}")
+        return
+
+    conn.exec_driver_sql("""
+        CREATE TRIGGER IF NOT EXISTS books_fts_ai AFTER INSERT ON books BEGIN
+            INSERT INTO books_fts(rowid, title, author) VALUES (new.id, new.title, new.author);
+        END
+    """)
+    conn.exec_driver_sql("""
+        CREATE TRIGGER IF NOT EXISTS books_fts_ad AFTER DELETE ON books BEGIN
+            INSERT INTO books_fts(books_fts, rowid, title, author) VALUES ('delete', old.id, old.title, old.author);
+        END
+    """)
+    conn.exec_driver_sql("""
+        CREATE TRIGGER IF NOT EXISTS books_fts_au AFTER UPDATE OF title, author ON books BEGIN
+            INSERT INTO books_fts(books_fts, rowid, title, author) VALUES ('delete', old.id, old.title, old.author);
+            INSERT INTO books_fts(rowid, title, author) VALUES (new.id, new.title, new.author);
+        END
+    """)
+
+    if not exists:
+        # Banco já existente: indexa os livros que já estavam cadastrados
+        conn.exec_driver_sql("INSERT INTO books_fts(books_fts) VALUES ('rebuild')")
+
+
+def _create_secondary_indexes(conn):
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_books_author ON books (author)")
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_books_publication_year ON books (publication_year)")
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_books_price ON books (price)")
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_books_created_at ON books (created_at)")
+
+
+def _track_changes(conn):
+    # updated_at marca inserções e alterações; exclusões ficam registradas em
+    # book_tombstones por trigger. export_watermarks guarda até onde cada
+    # exportação incremental já foi.
+    columns = {row[1] for row in conn.exec_driver_sql("PRAGMA table_info(books)")}
+    if 'updated_at' not in columns:
+        conn.exec_driver_sql("ALTER TABLE books ADD COLUMN updated_at DATETIME")
+    conn.exec_driver_sql("""
+        UPDATE books SET updated_at = COALESCE(created_at, strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime') || '000')
+        WHERE updated_at IS NULL
+    """)
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_books_updated_at ON books (updated_at)")
+    
+    conn.exec_driver_sql("""
+        CREATE TABLE IF NOT EXISTS book_tombstones (
+            book_id INTEGER NOT NULL,
+            deleted_at DATETIME NOT NULL
+        )
+    """)
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_book_tombstones_deleted_at ON book_tombstones (deleted_at)")
+    # Mesmo formato de data gravado pelo SQLAlchemy, para comparar como texto; o SQLite só
+    # tem milissegundos, o que DatabaseManager.change_high_watermark leva em conta
+    conn.exec_driver_sql("""
+        CREATE TRIGGER IF NOT EXISTS books_tombstone_ad AFTER DELETE ON books BEGIN
+            INSERT INTO book_tombstones (book_id, deleted_at)
+            VALUES (old.id, strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime') || '000');
+        END
+    """)
+    
+    conn.exec_driver_sql("""
+        CREATE TABLE IF NOT EXISTS export_watermarks (
+            feed VARCHAR(50) PRIMARY KEY,
+            watermark DATETIME NOT NULL,
+            updated_at DATETIME NOT NULL
+        )
+    """)
+
+
+def _create_import_checkpoints(conn):
+    # Um registro por arquivo importado (identificado pelo fingerprint), atualizado
+    # na mesma transação de cada lote gravado
+    conn.exec_driver_sql("""
+        CREATE TABLE IF NOT EXISTS import_checkpoints (
+            fingerprint VARCHAR(64) PRIMARY KEY,
+            filename VARCHAR(255) NOT NULL,
+            status VARCHAR(20) NOT NULL,
+            byte_offset INTEGER,
+            line INTEGER NOT NULL,
+            batch_id INTEGER NOT NULL,
+            imported INTEGER NOT NULL,
+            failed INTEGER NOT NULL,
+            updated_at DATETIME NOT NULL
+        )
+    """)
+
+
+def _create_natural_key_index(conn):
+    # Chave natural padrão do upsert (DatabaseManager.DEFAULT_NATURAL_KEY), com o
+    # mesmo nome usado por ensure_unique_key. Se já houver livros repetidos o índice
+    # não é criado aqui; ensure_unique_key explica o problema no primeiro upsert.
+    try:
+        conn.exec_driver_sql(
+            "CREATE UNIQUE INDEX IF NOT EXISTS ux_books_title_author_publication_year "
+            "ON books (title, author, publication_year)"
+        )
+    except IntegrityError:
+        logger.warning("Livros repetidos por título, autor e ano: índice único da chave natural não criado")
+
+
+def _create_fulltext_vocabulary(conn):
+    # Termos do índice FTS5 por coluna: a busca confere se cada termo digitado é uma
+    # palavra inteira do catálogo antes de usar o índice (ver DatabaseManager._search)
+    exists = conn.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE name = 'books_fts'"
+    ).first()
+    if exists:
+        conn.exec_driver_sql("CREATE VIRTUAL TABLE IF NOT EXISTS books_fts_vocab USING fts5vocab(books_fts, 'col')")
+
+
+# Novas alterações de schema entram no fim da lista com a próxima versão.
+# Cada migração recebe uma conexão já dentro de uma transação.
+MIGRATIONS = [
+    (1, "Índice de texto completo FTS5", _create_fulltext_index),
+    (2, "Índices em author, publication_year, price e created_at", _create_secondary_indexes),
+    (3, "Rastreamento de alterações: updated_at, tombstones e watermarks", _track_changes),
+    (4, "Checkpoints de importação", _create_import_checkpoints),
+    (5, "Índice único na chave natural (title, author, publication_year)", _create_natural_key_index),
+    (6, "Vocabulário do índice de texto completo", _create_fulltext_vocabulary),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+class MigrationService:
+    def __init__(self, engine):
+        self.engine = engine
+        self.logger = logging.getLogger(__name__)
+
+    def get_current_version(self, conn):
+        try:
+            version = conn.exec_driver_sql("SELECT MAX(version) FROM schema_version").scalar()
+            return version or 0
+        except OperationalError:
+            return 0
+
+    def migrate(self):
+        """
+        Aplica as migrações pendentes no banco de dados.
+
+        Returns:
+            int: Versão do schema após a execução
+        """
+        with self.engine.connect() as conn:
+            current = self.get_current_version(conn)
+
+        # Caminho comum: schema já atualizado, apenas uma consulta
+        if current >= LATEST_VERSION:
+            return current
+
+        with self.engine.begin() as conn:
+            conn.exec_driver_sql("""
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    description VARCHAR(200) NOT NULL,
+                    applied_at DATETIME NOT NULL
+                )
+            """)
+            current = self.get_current_version(conn)
+
+            for version, description, migration in MIGRATIONS:
+                if version <= current:
+                    continue
+
+                self.logger.info(f"Aplicando migração {version}: {description}")
+                migration(conn)
+                conn.exec_driver_sql(
+                    "INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)",
+                    (version, description, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+                )
+                current = version
+
+        self.logger.info(f"Schema do banco de dados na versão {current}")
+        return current
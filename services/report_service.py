@@ -1,53 +1,156 @@
 from pathlib import Path
 from datetime import datetime
-from collections import Counter
+from html import escape
+from itertools import chain, islice
 import logging
 
 class ReportService:
+    TOP_AUTHORS = 5
+    # Acima disso a distribuição por ano é agrupada por década
+    MAX_YEAR_ROWS = 30
+    PRICE_BUCKET = 10
+    CATALOG_COLUMNS = ['id', 'title', 'author', 'publication_year', 'price']
+    # Livros lidos do banco por vez ao gravar o catálogo
+    CHUNK_SIZE = 5000
+    
     def __init__(self, database_manager):
         self.db_manager = database_manager
         self.logger = logging.getLogger(__name__)
         Path("reports").mkdir(exist_ok=True)
     
-    def generate_html_report(self, filename=None):
+    def generate_html_report(self, filename=None, page_size=None):
+        """
+        Gera o relatório HTML gravando direto no arquivo à medida que os livros
+        são lidos, sem montar a página inteira na memória.
+        
+        Args:
+            filename: Nome do arquivo (padrão: report_<data>.html)
+            page_size: Se informado, divide o catálogo em páginas numeradas com
+                esse número de livros, gravadas em uma pasta com o nome do
+                relatório; o arquivo principal passa a ser o índice das páginas
+            
+        Returns:
+            str: Caminho do arquivo gerado (o índice, se paginado)
+        """
         try:
             if filename is None:
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 filename = f"report_{timestamp}.html"
             
             filepath = Path("reports") / filename
+            current_date = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
             
-            books = self.db_manager.get_all_books()
+            # Os agregados são calculados no banco; só o catálogo é percorrido, bloco a bloco
             stats = self.db_manager.get_statistics()
-            authors = [book.author for book in books]
-            author_count = Counter(authors)
-            top_authors = author_count.most_common(5)
-            years = [book.publication_year for book in books]
-            year_count = Counter(years)
-            html_content = self._generate_html_content(
-                books, stats, top_authors, year_count
+            top_authors = self.db_manager.top_authors(self.TOP_AUTHORS)
+            years = self.year_distribution()
+            prices = self.db_manager.price_buckets(self.PRICE_BUCKET)
+            rows = chain.from_iterable(
+                self.db_manager.iter_row_chunks(self.CATALOG_COLUMNS, self.CHUNK_SIZE)
             )
             
+            pages = None
+            if page_size:
+                pages = self._write_catalog_pages(filepath, rows, page_size, current_date)
+            
             with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(html_content)
+                self._write_page_start(f, "Relatório da Livraria", f"Gerado em {current_date}")
+                self._write_summary(f, stats, top_authors, years, prices)
+                
+                if pages is None:
+                    self._write_catalog(f, "Catálogo Completo", rows)
+                else:
+                    self._write_page_index(f, pages)
+                
+                self._write_page_end(f)
             
-            self.logger.info(f"Relatório HTML gerado: {filepath}")
+            if pages is None:
+                self.logger.info(f"Relatório HTML gerado: {filepath}")
+            else:
+                self.logger.info(f"Relatório HTML gerado: {filepath} ({len(pages)} página(s) de catálogo)")
             return str(filepath)
             
         except Exception as e:
             self.logger.error(f"Erro ao gerar relatório HTML: {e}")
             return None
     
-    def _generate_html_content(self, books, stats, top_authors, year_count):
-        current_date = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+    def year_distribution(self):
+        """
+        Distribuição dos livros por ano de publicação, ou por década se houver
+        anos demais para uma tabela legível.
+        
+        Returns:
+            list: (rótulo da faixa, quantidade) em ordem crescente
+        """
+        years = self.db_manager.year_histogram()
+        if len(years) <= self.MAX_YEAR_ROWS:
+            return [(str(year), count) for year, count in years]
+        
+        return [
+            (f"{decade}–{decade + 9}", count)
+            for decade, count in self.db_manager.year_histogram(bucket_size=10)
+        ]
+    
+    def _write_catalog_pages(self, filepath, rows, page_size, current_date):
+        """
+        Grava o catálogo em páginas de page_size livros. Só um livro é lido
+        adiante, para saber se existe uma próxima página.
+        
+        Returns:
+            list: Um dicionário por página (file, number, rows, first_id, last_id)
+        """
+        pages_dir = filepath.with_suffix("")
+        pages_dir.mkdir(parents=True, exist_ok=True)
+        index_link = f"../{escape(filepath.name)}"
+        
+        pages = []
+        next_row = next(rows, None)
+        
+        # Mesmo com o catálogo vazio é gravada uma página, para o índice não ficar sem links
+        while next_row is not None or not pages:
+            number = len(pages) + 1
+            page_file = pages_dir / f"page_{number:04d}.html"
+            page_rows = chain([next_row], islice(rows, page_size - 1)) if next_row is not None else iter(())
+            
+            with open(page_file, 'w', encoding='utf-8') as f:
+                self._write_page_start(f, f"Catálogo - Página {number}", f"Relatório gerado em {current_date}")
+                f.write(f"""
+            <div class="pagination">
+                <a href="{index_link}">&larr; Voltar ao índice</a>
+                <span>Página {number}</span>
+            </div>
+""")
+                written, first_id, last_id = self._write_catalog(f, "Livros", page_rows)
+                
+                next_row = next(rows, None)
+                previous_link = f'<a href="page_{number - 1:04d}.html">&larr; Anterior</a>' if number > 1 else "<span></span>"
+                next_link = f'<a href="page_{number + 1:04d}.html">Próxima &rarr;</a>' if next_row is not None else "<span></span>"
+                f.write(f"""
+            <div class="pagination">
+                {previous_link}
+                <a href="{index_link}">Índice</a>
+                {next_link}
+            </div>
+""")
+                self._write_page_end(f)
+            
+            pages.append({
+                'file': f"{pages_dir.name}/{page_file.name}",
+                'number': number,
+                'rows': written,
+                'first_id': first_id,
+                'last_id': last_id
+            })
         
-        html = f"""
-<!DOCTYPE html>
+        return pages
+    
+    def _write_page_start(self, f, title, subtitle):
+        f.write(f"""<!DOCTYPE html>
 <html lang="pt-BR">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Relatório da Livraria</title>
+    <title>{escape(title)}</title>
     <style>
         * {{
             margin: 0;
@@ -170,6 +273,36 @@ class ReportService:
             font-size: 0.9em;
         }}
         
+        .bar {{
+            height: 14px;
+            min-width: 2px;
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            border-radius: 3px;
+        }}
+        
+        .pagination {{
+            display: flex;
+            justify-content: space-between;
+            align-items: center;
+            margin: 15px 0;
+        }}
+        
+        .pagination a, .page-list a {{
+            color: #667eea;
+            text-decoration: none;
+            font-weight: bold;
+        }}
+        
+        .page-list {{
+            list-style: none;
+            columns: 3;
+            margin-top: 15px;
+        }}
+        
+        .page-list li {{
+            padding: 4px 0;
+        }}
+        
         .footer {{
             background: #f8f9fa;
             padding: 20px;
@@ -193,11 +326,27 @@ class ReportService:
 <body>
     <div class="container">
         <div class="header">
-            <h1>Relatório da Livraria</h1>
-            <p>Gerado em {current_date}</p>
+            <h1>{escape(title)}</h1>
+            <p>{escape(subtitle)}</p>
         </div>
         
         <div class="content">
+""")
+    
+    def _write_page_end(self, f):
+        f.write("""
+        </div>
+        
+        <div class="footer">
+            <p>Sistema de Gerenciamento de Livraria | Desenvolvido com Python & SQLAlchemy</p>
+        </div>
+    </div>
+</body>
+</html>
+""")
+    
+    def _write_summary(self, f, stats, top_authors, years, prices):
+        f.write(f"""
             <!-- Estatísticas Gerais -->
             <div class="section">
                 <h2>Estatísticas Gerais</h2>
@@ -227,20 +376,89 @@ class ReportService:
             
             <!-- Top Autores -->
             <div class="section">
-                <h2>Top 5 Autores</h2>
+                <h2>Top {self.TOP_AUTHORS} Autores</h2>
                 <div class="author-list">
-        """
+""")
         
         for author, count in top_authors:
-            html += f'<div class="author-badge">{author} ({count} livros)</div>\n'
+            f.write(f'<div class="author-badge">{escape(author)} ({count} livros)</div>\n')
         
-        html += """
+        f.write("""
                 </div>
             </div>
-            
-            <!-- Lista Completa de Livros -->
+""")
+        
+        self._write_distribution(f, "Livros por Ano de Publicação", "Ano", years)
+        self._write_distribution(
+            f, "Livros por Faixa de Preço", "Faixa",
+            [(f"R$ {low:.2f} a R$ {high:.2f}", count) for low, high, count in prices]
+        )
+    
+    def _write_distribution(self, f, heading, label_header, rows):
+        # Tabela com barra proporcional à maior faixa
+        largest = max((count for _, count in rows), default=0)
+        
+        f.write(f"""
+            <div class="section">
+                <h2>{escape(heading)}</h2>
+                <table>
+                    <thead>
+                        <tr>
+                            <th>{escape(label_header)}</th>
+                            <th>Livros</th>
+                            <th></th>
+                        </tr>
+                    </thead>
+                    <tbody>
+""")
+        
+        for label, count in rows:
+            width = count * 100 / largest if largest else 0
+            f.write(f"""                        <tr>
+                            <td>{escape(label)}</td>
+                            <td>{count}</td>
+                            <td><div class="bar" style="width: {width:.1f}%"></div></td>
+                        </tr>
+""")
+        
+        f.write("""                    </tbody>
+                </table>
+            </div>
+""")
+    
+    def _write_page_index(self, f, pages):
+        f.write("""
+            <!-- Páginas do Catálogo -->
+            <div class="section">
+                <h2>Catálogo</h2>
+                <ul class="page-list">
+""")
+        
+        for page in pages:
+            if page['rows']:
+                detail = f"IDs {page['first_id']} a {page['last_id']}"
+            else:
+                detail = "sem livros"
+            f.write(
+                f'                    <li><a href="{escape(page["file"])}">Página {page["number"]}</a> '
+                f'({detail})</li>\n'
+            )
+        
+        f.write("""                </ul>
+            </div>
+""")
+    
+    def _write_catalog(self, f, heading, rows):
+        """
+        Grava a tabela do catálogo linha a linha, escapando os campos de texto.
+        
+        Returns:
+            tuple: (livros gravados, primeiro ID, último ID)
+        """
+        f.write(f"""
+            <!-- Lista de Livros -->
             <div class="section">
-                <h2>Catálogo Completo</h2>
+                <h2>{escape(heading)}</h2>
                 <table>
                     <thead>
                         <tr>
@@ -252,34 +470,29 @@ class ReportService:
                         </tr>
                     </thead>
                     <tbody>
-        """
+""")
         
-        for book in books:
-            html += f"""
-                        <tr>
-                            <td>{book.id}</td>
-                            <td>{book.title}</td>
-                            <td>{book.author}</td>
-                            <td>{book.publication_year}</td>
-                            <td>R$ {book.price:.2f}</td>
+        written = 0
+        first_id = last_id = None
+        for book_id, title, author, year, price in rows:
+            f.write(f"""                        <tr>
+                            <td>{book_id}</td>
+                            <td>{escape(title)}</td>
+                            <td>{escape(author)}</td>
+                            <td>{year}</td>
+                            <td>R$ {price:.2f}</td>
                         </tr>
-            """
+""")
+            if first_id is None:
+                first_id = book_id
+            last_id = book_id
+            written += 1
         
-        html += """
-                    </tbody>
+        f.write("""                    </tbody>
                 </table>
             </div>
-        </div>
-        
-        <div class="footer">
-            <p>Sistema de Gerenciamento de Livraria | Desenvolvido com Python & SQLAlchemy</p>
-        </div>
-    </div>
-</body>
-</html>
-        """
-        
-        return html
+""")
+        return written, first_id, last_id
     
     def generate_text_report(self, filename=None):
         """
@@ -298,7 +511,6 @@ class ReportService:
             
             filepath = Path("reports") / filename
             
-            books = self.db_manager.get_all_books()
             stats = self.db_manager.get_statistics()
             
             with open(filepath, 'w', encoding='utf-8') as f:
@@ -318,7 +530,7 @@ class ReportService:
                 f.write("LISTA DE LIVROS\n")
                 f.write("-" * 70 + "\n")
                 
-                for book in books:
+                for book in self.db_manager.iter_books():
                     f.write(f"\nID: {book.id}\n")
                     f.write(f"Título: {book.title}\n")
                     f.write(f"Autor: {book.author}\n")
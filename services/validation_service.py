@@ -1,57 +1,268 @@
-from datetime import datetime
-import re
+from collections import Counter
+from datetime import date, datetime
+import pandas as pd
+
+# Regras dos livros declaradas uma única vez. Cada chave de regra vira uma regra
+# nomeada "<campo>-<regra>" (ex.: title-length), com seu contador de violações.
+# Limites podem ser funções: são resolvidos uma vez, na compilação.
+BOOK_SCHEMA = {
+    'title': {
+        'type': 'text',
+        'max_length': 80,
+        'messages': {
+            'required': "O título não pode estar vazio.",
+            'length': "O título não pode ter mais de {max_length} caracteres."
+        }
+    },
+    'author': {
+        'type': 'text',
+        'max_length': 30,
+        'messages': {
+            'required': "O nome do autor não pode estar vazio.",
+            'length': "O nome do autor não pode ter mais de {max_length} caracteres."
+        }
+    },
+    'publication_year': {
+        'type': 'integer',
+        'max': lambda: datetime.now().year + 1,
+        'messages': {
+            'type': "O ano deve ser um número inteiro válido.",
+            'max': "O ano de publicação não pode ser maior que {max}."
+        }
+    },
+    'price': {
+        'type': 'number',
+        'min': 0,
+        'messages': {
+            'type': "O preço deve ser um número válido.",
+            'min': "O preço não pode ser negativo."
+        }
+    }
+}
+
+INTEGER_PATTERN = r'[+-]?\d+'
+
+
+class SchemaValidator:
+    """
+    Validador compilado a partir de um schema declarativo.
+
+    Na compilação cada campo vira uma função de checagem com os limites já
+    resolvidos, para que nada seja recalculado linha a linha. Pode ser usado
+    campo a campo (interface), por colunas inteiras (DataFrame) ou como
+    gerador sobre um fluxo de registros. Cada regra violada incrementa
+    violations[regra], de modo que um resumo não precisa guardar uma mensagem
+    por linha.
+
+    Args:
+        schema: Dicionário campo -> especificação (ver BOOK_SCHEMA)
+    """
+
+    def __init__(self, schema):
+        self.compiled_on = date.today()
+        self.violations = Counter()
+        self.fields = list(schema)
+        self._checks = {}
+        self._column_checks = {}
+        self._messages = {}
+
+        for field, spec in schema.items():
+            spec = {key: value() if callable(value) else value for key, value in spec.items()}
+            for rule, template in spec['messages'].items():
+                self._messages[f"{field}-{rule}"] = template.format(**spec)
+            compile_field = getattr(self, f"_compile_{spec['type']}")
+            self._checks[field], self._column_checks[field] = compile_field(field, spec)
 
-class ValidationService:
     @staticmethod
-    def validate_title(title):
-        if not title or not title.strip():
-            return False, "O título não pode estar vazio."
-        
-        if len(title.strip()) < 1:
-            return False, "O título deve ter pelo menos 1 caracter."
-        
-        if len(title.strip()) > 80:
-            return False, "O título não pode ter mais de 80 caracteres."
-        
-        return True, ""
-    
+    def _compile_text(field, spec):
+        max_length = spec.get('max_length')
+        required_rule = f"{field}-required"
+        length_rule = f"{field}-length"
+
+        def check(value):
+            text = value.strip() if value else ''
+            if not text:
+                return text, required_rule
+            if max_length is not None and len(text) > max_length:
+                return text, length_rule
+            return text, None
+
+        def check_column(column):
+            text = column.fillna('').astype(str).str.strip()
+            lengths = text.str.len()
+            rules = [(required_rule, lengths == 0)]
+            if max_length is not None:
+                rules.append((length_rule, lengths > max_length))
+            return text, rules
+
+        return check, check_column
+
     @staticmethod
-    def validate_author(author):
-        if not author or not author.strip():
-            return False, "O nome do autor não pode estar vazio."
-        
-        if len(author.strip()) < 1:
-            return False, "O nome do autor deve ter pelo menos 2 caracteres."
-        
-        if len(author.strip()) > 30:
-            return False, "O nome do autor não pode ter mais de 30 caracteres."
-        
+    def _compile_range(field, spec, convert, to_numeric):
+        minimum = spec.get('min')
+        maximum = spec.get('max')
+        type_rule = f"{field}-type"
+        min_rule = f"{field}-min"
+        max_rule = f"{field}-max"
+
+        def check(value):
+            try:
+                number = convert(value)
+            except (ValueError, TypeError):
+                return None, type_rule
+            if number != number:  # NaN
+                return None, type_rule
+            if minimum is not None and number < minimum:
+                return number, min_rule
+            if maximum is not None and number > maximum:
+                return number, max_rule
+            return number, None
+
+        def check_column(column):
+            numbers = to_numeric(column.fillna('').astype(str).str.strip())
+            rules = [(type_rule, numbers.isna())]
+            if minimum is not None:
+                rules.append((min_rule, numbers < minimum))
+            if maximum is not None:
+                rules.append((max_rule, numbers > maximum))
+            return numbers, rules
+
+        return check, check_column
+
+    @classmethod
+    def _compile_integer(cls, field, spec):
+        def to_numeric(text):
+            return pd.to_numeric(text.where(text.str.fullmatch(INTEGER_PATTERN, na=False)), errors='coerce')
+
+        return cls._compile_range(field, spec, int, to_numeric)
+
+    @classmethod
+    def _compile_number(cls, field, spec):
+        def to_numeric(text):
+            return pd.to_numeric(text, errors='coerce')
+
+        return cls._compile_range(field, spec, float, to_numeric)
+
+    def message(self, rule):
+        return self._messages[rule]
+
+    def messages(self, rules):
+        return [self._messages[rule] for rule in rules]
+
+    def check_field(self, field, value):
+        """
+        Valida um único campo, sem contar violações (uso na interface).
+
+        Returns:
+            tuple: (bool, str) - (válido, mensagem de erro)
+        """
+        _, rule = self._checks[field](value)
+        if rule:
+            return False, self._messages[rule]
         return True, ""
-    
-    @staticmethod
-    def validate_year(year):
-        try:
-            year_int = int(year)
-            current_year = datetime.now().year
 
-            if year_int > current_year + 1:
-                return False, f"O ano de publicação não pode ser maior que {current_year + 1}."
-            
-            return True, ""
-        except (ValueError, TypeError):
-            return False, "O ano deve ser um número inteiro válido."
+    def iter_valid(self, records, on_invalid=None):
+        """
+        Gerador: valida um fluxo de (chave, registro) e devolve só os válidos.
+
+        Args:
+            records: Iterável de (chave, registro), ex.: (número da linha, dicionário)
+            on_invalid: Callback opcional chamado com (chave, registro original, regras violadas)
+
+        Yields:
+            tuple: (chave, valores convertidos)
+        """
+        checks = list(self._checks.items())
+        violations = self.violations
+
+        for key, record in records:
+            values = {}
+            failed = None
+            for field, check in checks:
+                values[field], rule = check(record.get(field))
+                if rule:
+                    if failed is None:
+                        failed = []
+                    failed.append(rule)
+
+            if failed is None:
+                yield key, values
+            else:
+                violations.update(failed)
+                if on_invalid:
+                    on_invalid(key, record, failed)
+
+    def validate_columns(self, columns):
+        """
+        Valida colunas inteiras de uma vez, sem percorrer linha por linha.
+
+        Args:
+            columns: DataFrame (ou dicionário de listas) com os campos do schema
+
+        Returns:
+            tuple: (Series, dict, dict) - (máscara de linhas válidas, regras violadas
+                por índice das linhas inválidas, colunas convertidas)
+        """
+        if not isinstance(columns, pd.DataFrame):
+            columns = pd.DataFrame(columns)
+
+        converted = {}
+        rules = []
+        for field, check_column in self._column_checks.items():
+            column = columns[field] if field in columns else pd.Series('', index=columns.index)
+            converted[field], field_rules = check_column(column)
+            rules.extend(field_rules)
+
+        invalid = pd.Series(False, index=columns.index)
+        for _, mask in rules:
+            invalid |= mask
+
+        errors = {}
+        if invalid.any():
+            for rule, mask in rules:
+                failed = mask[mask].index
+                if len(failed):
+                    self.violations[rule] += len(failed)
+                    for index in failed:
+                        errors.setdefault(index, []).append(rule)
+            errors = dict(sorted(errors.items()))
+
+        return ~invalid, errors, converted
+
+
+class ValidationService:    
+    _shared_validator = None
     
     @staticmethod
-    def validate_price(price):
-        try:
-            price_float = float(price)
-            
-            if price_float < 0:
-                return False, "O preço não pode ser negativo."
-            
-            return True, ""
-        except (ValueError, TypeError):
-            return False, "O preço deve ser um número válido."
+    def compile(schema=None):
+        """
+        Compila um schema (padrão: BOOK_SCHEMA) em um validador novo, com
+        contadores de violação zerados.
+        """
+        return SchemaValidator(schema or BOOK_SCHEMA)
+    
+    @classmethod
+    def _validator(cls):
+        # Validador compartilhado pela interface, recompilado na virada do dia (ano máximo)
+        if cls._shared_validator is None or cls._shared_validator.compiled_on != date.today():
+            cls._shared_validator = cls.compile()
+        return cls._shared_validator
+    
+    @classmethod
+    def validate_title(cls, title):
+        return cls._validator().check_field('title', title)
+    
+    @classmethod
+    def validate_author(cls, author):
+        return cls._validator().check_field('author', author)
+    
+    @classmethod
+    def validate_year(cls, year):
+        return cls._validator().check_field('publication_year', year)
+    
+    @classmethod
+    def validate_price(cls, price):
+        return cls._validator().check_field('price', price)
     
     @staticmethod
     def validate_id(book_id):
@@ -75,26 +286,17 @@ class ValidationService:
             author: Autor do livro
             year: Ano de publicação
             price: Preço do livro
-            
+        
         Returns:
             tuple: (bool, list) - (válido, lista_de_erros)
         """
-        errors = []
-        
-        valid, error = cls.validate_title(title)
-        if not valid:
-            errors.append(error)
-        
-        valid, error = cls.validate_author(author)
-        if not valid:
-            errors.append(error)
-        
-        valid, error = cls.validate_year(year)
-        if not valid:
-            errors.append(error)
-        
-        valid, error = cls.validate_price(price)
-        if not valid:
-            errors.append(error)
+        validator = cls._validator()
+        checks = [
+            validator.check_field('title', title),
+            validator.check_field('author', author),
+            validator.check_field('publication_year', year),
+            validator.check_field('price', price)
+        ]
+        errors = [error for valid, error in checks if not valid]
         
         return len(errors) == 0, errors
@@ -0,0 +1,337 @@
+from pathlib import Path
+from datetime import datetime
+import json
+import os
+import shutil
+import sqlite3
+import struct
+import logging
+
+# Estrutura do arquivo WAL do SQLite: cabeçalho de 32 bytes seguido de frames
+# (cabeçalho de 24 bytes + uma página). Os salts do cabeçalho identificam a
+# geração atual do WAL; frames com outros salts são restos de gerações antigas.
+WAL_HEADER = struct.Struct(">IIIIII8x")
+WAL_FRAME_HEADER = struct.Struct(">IIII8x")
+
+
+class WalArchiveService:
+    """
+    Arquiva os segmentos do WAL antes de cada checkpoint e reconstrói o banco
+    em qualquer instante a partir de um snapshot base mais os segmentos.
+
+    Cada geração do WAL (do início até o checkpoint que a trunca) é arquivada
+    em um ou mais segmentos. Um snapshot base é sempre tirado logo após um
+    checkpoint completo, com o WAL vazio, no início de uma nova geração.
+
+    Se o banco mudar sem passar pelo arquivo (ex.: o SQLite fez o checkpoint ao
+    fechar a última conexão), a geração perdida fica registrada como lacuna e
+    nenhuma restauração atravessa esse trecho.
+
+    Args:
+        db_path: Caminho do banco de dados
+        archive_dir: Pasta do arquivo
+        keep_bases: Snapshots base mantidos; bases mais antigas e os segmentos
+            que só elas usam são removidos
+    """
+
+    def __init__(self, db_path, archive_dir="wal_archive", keep_bases=3):
+        self.db_path = Path(db_path)
+        self.wal_path = Path(f"{db_path}-wal")
+        self.archive_dir = Path(archive_dir)
+        self.keep_bases = keep_bases
+        self.index_path = self.archive_dir / "index.json"
+        self.logger = logging.getLogger(__name__)
+
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'generation': 0, 'salt': None, 'offset': 0, 'segments': [], 'bases': [], 'gaps': []}
+
+    def _save_index(self, index):
+        tmp_path = self.index_path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    def _scan_wal(self):
+        """
+        Localiza o fim do último commit da geração atual do WAL.
+
+        Returns:
+            tuple: (salts, offset_final) ou None se o WAL estiver vazio
+        """
+        if not self.wal_path.exists() or self.wal_path.stat().st_size < WAL_HEADER.size:
+            return None
+
+        with open(self.wal_path, 'rb') as f:
+            _, _, page_size, _, salt1, salt2 = WAL_HEADER.unpack(f.read(WAL_HEADER.size))
+            frame_size = WAL_FRAME_HEADER.size + page_size
+            offset = WAL_HEADER.size
+            committed_end = None
+
+            while True:
+                f.seek(offset)
+                header = f.read(WAL_FRAME_HEADER.size)
+                if len(header) < WAL_FRAME_HEADER.size:
+                    break
+                _, db_size, frame_salt1, frame_salt2 = WAL_FRAME_HEADER.unpack(header)
+                if (frame_salt1, frame_salt2) != (salt1, salt2):
+                    break
+                offset += frame_size
+                if db_size:
+                    # Frame de commit: tudo até aqui faz parte de transações confirmadas
+                    committed_end = offset
+
+        if committed_end is None:
+            return None
+        return [salt1, salt2], committed_end
+
+    def has_base(self):
+        return bool(self._load_index()['bases'])
+
+    def _db_stamp(self):
+        if not self.db_path.exists():
+            return None
+        stat = self.db_path.stat()
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def record_db_state(self):
+        # Chamado após cada checkpoint: até aqui, tudo o que chegou ao banco foi arquivado
+        index = self._load_index()
+        index['db_stamp'] = self._db_stamp()
+        self._save_index(index)
+
+    def db_changed(self):
+        """
+        Indica se o arquivo do banco mudou depois do último checkpoint feito
+        pelo arquivo do WAL, ou seja, se há alterações que nunca foram arquivadas.
+        """
+        index = self._load_index()
+        if not index['bases']:
+            return False
+        return index.get('db_stamp') != self._db_stamp()
+
+    def mark_gap(self):
+        """
+        Registra que alterações chegaram ao banco sem ser arquivadas. A geração
+        correspondente fica vazia e marcada; replay recusa atravessá-la.
+        """
+        index = self._load_index()
+        index['generation'] += 1
+        index['salt'] = None
+        index['offset'] = 0
+        index.setdefault('gaps', []).append({
+            'generation': index['generation'],
+            'detected_at': datetime.now().isoformat()
+        })
+        self._save_index(index)
+        self.logger.warning(
+            f"Alterações no banco sem arquivamento do WAL: lacuna registrada na geração {index['generation']}"
+        )
+
+    def archive_segment(self):
+        """
+        Copia para o arquivo os frames confirmados do WAL que ainda não foram
+        arquivados. Deve ser chamado sem escritas em andamento.
+
+        Returns:
+            dict: Segmento arquivado ou None se não havia nada novo
+        """
+        scan = self._scan_wal()
+        if scan is None:
+            return None
+
+        salt, end = scan
+        index = self._load_index()
+
+        if salt != index['salt']:
+            # Nova geração do WAL: o segmento começa no cabeçalho
+            index['generation'] += 1
+            index['salt'] = salt
+            index['offset'] = 0
+
+        start = index['offset']
+        if end <= start:
+            return None
+
+        generation_segments = [s for s in index['segments'] if s['generation'] == index['generation']]
+        segment_file = f"wal_{index['generation']:06d}_{len(generation_segments) + 1:04d}.seg"
+
+        with open(self.wal_path, 'rb') as src:
+            src.seek(start)
+            data = src.read(end - start)
+
+        tmp_path = self.archive_dir / f"{segment_file}.tmp"
+        with open(tmp_path, 'wb') as out:
+            out.write(data)
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp_path, self.archive_dir / segment_file)
+
+        segment = {
+            'file': segment_file,
+            'generation': index['generation'],
+            'start': start,
+            'end': end,
+            'archived_at': datetime.now().isoformat()
+        }
+        index['segments'].append(segment)
+        index['offset'] = end
+        self._save_index(index)
+
+        self.logger.info(f"Segmento WAL arquivado: {segment_file} ({end - start} bytes)")
+        return segment
+
+    def close_generation(self):
+        # Chamado após um checkpoint que truncou o WAL: a próxima escrita inicia nova geração
+        index = self._load_index()
+        index['salt'] = None
+        index['offset'] = 0
+        self._save_index(index)
+
+    def create_base(self):
+        """
+        Tira um snapshot base do banco. Deve ser chamado logo após um checkpoint
+        que truncou o WAL, sem escritas em andamento.
+        """
+        index = self._load_index()
+        base_file = f"base_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.db"
+
+        src = sqlite3.connect(self.db_path.resolve().as_uri() + "?mode=ro", uri=True)
+        try:
+            dst = sqlite3.connect(str(self.archive_dir / base_file))
+            try:
+                src.backup(dst)
+            finally:
+                dst.close()
+        finally:
+            src.close()
+
+        index['bases'].append({
+            'file': base_file,
+            'next_generation': index['generation'] + 1,
+            'created_at': datetime.now().isoformat()
+        })
+        removed = self._apply_retention(index)
+        self._save_index(index)
+        self.logger.info(f"Snapshot base do arquivo WAL criado: {base_file}")
+
+        # Arquivos removidos só depois de o índice deixar de referenciá-los
+        for name in removed:
+            (self.archive_dir / name).unlink(missing_ok=True)
+        if removed:
+            self.logger.info(f"{len(removed)} arquivo(s) antigo(s) do arquivo WAL removido(s)")
+
+    def _apply_retention(self, index):
+        """
+        Mantém as keep_bases bases mais recentes e descarta os segmentos e
+        lacunas anteriores à mais antiga delas.
+
+        Returns:
+            list: Nomes dos arquivos que deixaram de ser referenciados
+        """
+        if len(index['bases']) <= self.keep_bases:
+            return []
+
+        expired = index['bases'][:-self.keep_bases]
+        index['bases'] = index['bases'][-self.keep_bases:]
+        first_generation = index['bases'][0]['next_generation']
+
+        expired_segments = [s for s in index['segments'] if s['generation'] < first_generation]
+        index['segments'] = [s for s in index['segments'] if s['generation'] >= first_generation]
+        index['gaps'] = [g for g in index.get('gaps', []) if g['generation'] >= first_generation]
+        return [base['file'] for base in expired] + [segment['file'] for segment in expired_segments]
+
+    def get_archive_stats(self):
+        index = self._load_index()
+        segment_bytes = sum(s['end'] - s['start'] for s in index['segments'])
+        base_bytes = sum(
+            (self.archive_dir / base['file']).stat().st_size
+            for base in index['bases']
+            if (self.archive_dir / base['file']).exists()
+        )
+        return {
+            'bases': len(index['bases']),
+            'segments': len(index['segments']),
+            'generations': index['generation'],
+            'segment_bytes': segment_bytes,
+            'base_bytes': base_bytes,
+            'total_mb': round((segment_bytes + base_bytes) / (1024 * 1024), 2),
+            'oldest_point': index['bases'][0]['created_at'] if index['bases'] else None,
+            'latest_point': index['segments'][-1]['archived_at'] if index['segments'] else None
+        }
+
+    def replay(self, target_time, output_path):
+        """
+        Reconstrói o banco como estava no último arquivamento até target_time.
+
+        Args:
+            target_time: datetime do ponto de recuperação
+            output_path: Arquivo onde o banco reconstruído será gravado
+
+        Returns:
+            dict: Segmentos aplicados e instante efetivamente recuperado
+        """
+        index = self._load_index()
+        target = target_time.isoformat()
+
+        bases = [base for base in index['bases'] if base['created_at'] <= target]
+        if not bases:
+            raise ValueError("Não há snapshot base anterior ao instante solicitado.")
+        base = bases[-1]
+
+        output_path = Path(output_path)
+        output_wal = Path(f"{output_path}-wal")
+        shutil.copyfile(self.archive_dir / base['file'], output_path)
+
+        applied = 0
+        recovered_at = base['created_at']
+        generation = base['next_generation']
+        gaps = {gap['generation'] for gap in index.get('gaps', [])}
+
+        while True:
+            if generation in gaps:
+                # Tudo o que foi arquivado antes já vale até target_time, mas o que veio
+                # depois (e até a próxima base) nunca foi arquivado: o estado é desconhecido
+                raise ValueError(
+                    "O arquivo do WAL tem uma lacuna após o último segmento anterior ao "
+                    "instante solicitado; escolha um instante a partir do snapshot base seguinte."
+                )
+            segments = [s for s in index['segments'] if s['generation'] == generation]
+            selected = [s for s in segments if s['archived_at'] <= target]
+            if not selected:
+                break
+
+            # Reconstitui o WAL da geração e deixa o SQLite aplicá-lo no checkpoint
+            with open(output_wal, 'wb') as out:
+                for segment in selected:
+                    with open(self.archive_dir / segment['file'], 'rb') as src:
+                        shutil.copyfileobj(src, out)
+
+            conn = sqlite3.connect(str(output_path))
+            try:
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            finally:
+                conn.close()
+
+            applied += len(selected)
+            recovered_at = selected[-1]['archived_at']
+            if len(selected) < len(segments):
+                break
+            generation += 1
+
+        conn = sqlite3.connect(str(output_path))
+        try:
+            conn.execute("PRAGMA journal_mode=DELETE")
+        finally:
+            conn.close()
+
+        return {
+            'base': base['file'],
+            'segments_applied': applied,
+            'recovered_at': recovered_at
+        }
@@ -63,9 +63,15 @@ def verify_structure():
         'services/database_manager.py',
         'services/backup_service.py',
         'services/csv_service.py',
+        'services/export_service.py',
+        'services/batch_import_service.py',
         'services/report_service.py',
         'services/validation_service.py',
         'services/initialization_service.py',
+        'services/migration_service.py',
+        'services/cache_service.py',
+        'services/backup_scheduler.py',
+        'services/wal_archive_service.py',
         'utils/screen_utils.py'
     ]
     
@@ -37,12 +37,14 @@ class ScreenUtils:
             ("4", "Remover um livro", "🗑️"),
             ("5", "Buscar livros por autor", "🔍"),
             ("6", "Busca avançada (título/autor)", "🔎"),
-            ("7", "Exportar dados para CSV", "📤"),
-            ("8", "Importar dados de CSV", "📥"),
+            ("7", "Exportar dados (CSV, Parquet, Arrow, JSONL)", "📤"),
+            ("8", "Importar dados (CSV, Parquet, Arrow, JSONL)", "📥"),
             ("9", "Gerar relatório HTML", "📊"),
             ("10", "Fazer backup do banco de dados", "💾"),
             ("11", "Ver estatísticas", "📈"),
             ("12", "Listar backups disponíveis", "📂"),
+            ("13", "Reconstruir índice de busca", "🔧"),
+            ("14", "Importar arquivos pendentes (pasta imports)", "🗂️"),
             ("0", "Sair", "🚪")
         ]
         
@@ -165,6 +167,8 @@ class ScreenUtils:
     def ask_search_author(cls):
         cls.print_header("BUSCAR POR AUTOR")
         
+        print(f"{Colors.YELLOW}Palavras inteiras encontram também as que começam por elas (sem acento);"
+              f" um pedaço de palavra busca o trecho em qualquer posição.{Colors.ENDC}")
         author = input(f"{Colors.BLUE}Nome do autor (ou parte dele): {Colors.ENDC}").strip().upper()
         return author
     
@@ -172,6 +176,8 @@ class ScreenUtils:
     def ask_search_query(cls):
         cls.print_header("BUSCA AVANÇADA")
         
+        print(f"{Colors.YELLOW}Palavras inteiras encontram também as que começam por elas, em qualquer ordem"
+              f" e sem acento; um pedaço de palavra busca o trecho em qualquer posição.{Colors.ENDC}")
         query = input(f"{Colors.BLUE}Digite o termo de busca (título ou autor): {Colors.ENDC}").strip().upper()
         return query
     
@@ -214,10 +220,21 @@ class ScreenUtils:
         
         print(f"\n{Colors.GREEN}{Colors.BOLD}💾 {len(backups)} backup(s) disponível(eis):{Colors.ENDC}\n")
         
+        formats = {'full': 'Completo', 'incremental': 'Incremental', 'compressed': 'Compactado'}
+        
         for idx, backup in enumerate(backups, 1):
             print(f"{idx}. {Colors.CYAN}{backup['name']}{Colors.ENDC}")
             print(f"   Data: {backup['modified'].strftime('%d/%m/%Y %H:%M:%S')}")
-            print(f"   Tamanho: {backup['size_mb']} MB\n")
+            print(f"   Formato: {formats.get(backup.get('format'), backup.get('format'))}")
+            if backup.get('compressed_mb') is not None:
+                print(f"   Tamanho: {backup['size_mb']} MB (compactado: {backup['compressed_mb']} MB)")
+            else:
+                print(f"   Tamanho: {backup['size_mb']} MB")
+            if backup.get('row_count') is not None:
+                print(f"   Livros: {backup['row_count']} | Versão do schema: {backup['schema_version']}")
+            if backup.get('checksum'):
+                print(f"   Checksum: {backup['checksum'][:16]}...")
+            print()
     
     @staticmethod
     def print_success(message):